@@ -5,18 +5,33 @@ Converts research papers into engaging podcast conversations.
 from google.adk.agents import Agent, SequentialAgent
 from google.adk.runners import InMemoryRunner
 from google.adk.tools import FunctionTool
-import PyPDF2
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import re
 import json
+import time
 import shutil
 import asyncio
+import secrets
 import warnings
+from functools import lru_cache
 import streamlit as st
-from tools import PodcastAudioGenerator, PodcastMixer, VoiceConfig
+import streamlit.components.v1 as components
+from google.adk.models import Gemini
+from google.genai import types
+from client_pool import CLIENT_POOL, get_client
+from disk_cache import DiskLRUCache
+from fake_backends import FakeLlm
+from pdf_engines import DEFAULT_ENGINE
+from pdf_extract import CHARS_PER_TOKEN, DEFAULT_PARALLEL_MIN_PAGES, extract_text
+from text_cleanup import clean_text
+from context_selection import TokenCounter, drop_page_breaks, select_context
+from tools import OUTPUT_PROFILES, AudioConfig, LivePreview, PodcastAudioGenerator, PodcastMixer, VoiceConfig
+from ratelimit import RateLimiter, bucket_key, is_rate_limit_error, retry_delay
+from segment_manifest import MANIFEST_FILENAME
 
 # Import authentication module
 from auth import (
@@ -54,9 +69,50 @@ load_dotenv()
 os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "FALSE"
 
 
-def setup_directories():
-    """Set up organized directory structure."""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+# Job ids accepted from the command line and the URL (outputs/<job_id>)
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def new_job_id() -> str:
+    """
+    Create a job id: a timestamp plus a random suffix, so jobs started in the
+    same second do not share a directory and ids in URLs cannot be guessed.
+    """
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}"
+
+
+def is_resumable_job(job_id: Optional[str]) -> bool:
+    """
+    Check whether a job's audio stage started and can be resumed.
+    
+    Args:
+        job_id: Job id (outputs/<job_id>)
+        
+    Returns:
+        True if the job saved its script and has a segment manifest
+    """
+    if not job_id or not JOB_ID_PATTERN.match(job_id):
+        return False
+    base = os.path.join('outputs', job_id)
+    return (
+        os.path.exists(os.path.join(base, 'segments', MANIFEST_FILENAME))
+        and os.path.exists(os.path.join(base, 'data', ENHANCED_SCRIPT_FILE))
+    )
+
+
+def setup_directories(job_id: Optional[str] = None):
+    """
+    Set up organized directory structure.
+    
+    Args:
+        job_id: Job (outputs/<job_id>) to create or resume; a new job id is created if None
+        
+    Raises:
+        ValueError: If the job id is not a plain directory name
+    """
+    if job_id and not JOB_ID_PATTERN.match(job_id):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    timestamp = job_id or new_job_id()
     
     dirs = {
         'BASE': f'outputs/{timestamp}',
@@ -71,26 +127,68 @@ def setup_directories():
     return dirs
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+# Most characters of paper text extracted; pages past this are not parsed
+PDF_MAX_CHARS = 400000
+
+# Token budget of the paper text sent to the agents
+PAPER_MAX_TOKENS = 12500
+
+# Model used by all agents
+LLM_MODEL = "gemini-2.0-flash-exp"
+
+# Script the audio stage synthesizes, saved in the job's data/ directory
+ENHANCED_SCRIPT_FILE = "enhanced_podcast_script.json"
+
+# Extracted text cache shared by all jobs, created on first use
+_pdf_cache: Optional[DiskLRUCache] = None
+
+
+def get_pdf_cache() -> Optional[DiskLRUCache]:
+    """
+    Get the extracted PDF text cache.
+    
+    Returns:
+        DiskLRUCache in PDF_CACHE_DIR (default cache/pdf_text), or None if PDF_CACHE_DIR=""
+    """
+    global _pdf_cache
+    cache_dir = os.getenv("PDF_CACHE_DIR", "cache/pdf_text")
+    if not cache_dir:
+        return None
+    if _pdf_cache is None or _pdf_cache.cache_dir != cache_dir:
+        max_mb = int(os.getenv("PDF_CACHE_MAX_MB", "64"))
+        _pdf_cache = DiskLRUCache(cache_dir, max_bytes=max_mb * 1024 * 1024, suffix=".txt.z")
+    return _pdf_cache
+
+
+def extract_text_from_pdf(
+    pdf_path: str,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> str:
     """
     Extract text content from a PDF file.
     
     Args:
         pdf_path: Path to the PDF file
+        max_chars: Stop reading pages once this many characters are extracted
+        max_tokens: Stop reading pages once about this many LLM tokens are extracted
         
     Returns:
-        Extracted text content
+        Extracted text content, cut to the budget
     """
-    text = ""
+    workers = os.getenv("PDF_EXTRACT_WORKERS")
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        return extract_text(
+            pdf_path,
+            workers=int(workers) if workers else None,
+            parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", DEFAULT_PARALLEL_MIN_PAGES)),
+            max_chars=max_chars,
+            max_tokens=max_tokens,
+            cache=get_pdf_cache(),
+            engine=os.getenv("PDF_ENGINE", DEFAULT_ENGINE)
+        )
     except Exception as e:
         raise ValueError(f"Error reading PDF: {str(e)}")
-    
-    return text
 
 
 # --- Pydantic Models ---
@@ -119,6 +217,212 @@ class PodcastScript(BaseModel):
 # Global variables for audio generation context
 _audio_context = {}
 
+# Streamlit serves this directory at app/static/ (server.enableStaticServing)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Live HLS playlists of running jobs, one unguessable directory per job
+LIVE_DIR = os.path.join(STATIC_DIR, "live")
+
+# hls.js for the live player, vendored in the static directory and inlined into
+# the player instead of loaded from a CDN (pinned and downloaded at image build
+# time, see the Dockerfile)
+HLS_JS_FILE = "vendor/hls.min.js"
+
+# Live playlists are removed once they are this old, in seconds
+LIVE_RETENTION_SECONDS = 3600
+
+
+def prune_live_dirs(max_age: float = LIVE_RETENTION_SECONDS) -> None:
+    """Remove live playlist directories of jobs that finished long ago."""
+    if not os.path.isdir(LIVE_DIR):
+        return
+    now = time.time()
+    for name in os.listdir(LIVE_DIR):
+        path = os.path.join(LIVE_DIR, name)
+        if os.path.isdir(path) and now - os.path.getmtime(path) > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def clean_paper_text(paper_text: str) -> str:
+    """
+    Remove extraction noise (headers, page numbers, hyphenation, debris) from paper text.
+    
+    Page breaks are kept for select_paper_context, which finds stamps at
+    page edges. Set ``TEXT_CLEANUP=0`` to skip the cleanup.
+    
+    Args:
+        paper_text: Extracted paper text
+        
+    Returns:
+        Cleaned paper text
+    """
+    if os.getenv("TEXT_CLEANUP", "1") == "0":
+        return paper_text
+    
+    result = clean_text(paper_text)
+    steps = ", ".join(f"{step} {count}" for step, count in result.removed.items() if count)
+    share = result.removed_chars / result.input_chars if result.input_chars else 0.0
+    print(f"Text cleanup removed {result.removed_chars}/{result.input_chars} characters "
+          f"({share:.1%}){': ' + steps if steps else ''}")
+    return result.text
+
+
+def select_paper_context(paper_text: str) -> str:
+    """
+    Select the paper text sent to the agents.
+    
+    ``CONTEXT_SELECTION=sections`` (default) drops the reference list and
+    boilerplate and fills the PAPER_MAX_TOKENS budget by section priority;
+    ``CONTEXT_SELECTION=prefix`` keeps the start of the paper up to the budget.
+    
+    Args:
+        paper_text: Extracted paper text
+        
+    Returns:
+        Paper text for the prompt
+    """
+    max_tokens = int(os.getenv("PAPER_MAX_TOKENS", PAPER_MAX_TOKENS))
+    if os.getenv("CONTEXT_SELECTION", "sections") == "prefix":
+        return drop_page_breaks(paper_text)[:max_tokens * CHARS_PER_TOKEN]
+    
+    if os.getenv("LLM_BACKEND", "gemini") == "fake":
+        counter = TokenCounter()
+    else:
+        counter = TokenCounter(
+            LLM_MODEL,
+            get_client(os.getenv("GOOGLE_API_KEY")),
+            build_llm_limiter(),
+            bucket_key("llm", os.getenv("GOOGLE_API_KEY"))
+        )
+    selection = select_context(paper_text, max_tokens, counter)
+    print(f"Paper context: {selection.selected_tokens}/{selection.input_tokens} tokens "
+          f"({selection.token_counter} count), kept {', '.join(selection.kept + selection.truncated) or 'nothing'}, "
+          f"dropped {', '.join(selection.dropped) or 'nothing'}")
+    return selection.text
+
+
+def build_llm():
+    """
+    Build the model shared by all agents.
+    
+    ``LLM_BACKEND=fake`` selects the offline stand-in, which returns canned
+    summaries and scripts so the pipeline runs without network or quota.
+    
+    Failed calls (quota errors and server errors) are retried by the
+    model's own client with exponential backoff, up to ``RATE_LIMIT_RETRIES``
+    times.
+    
+    Returns:
+        ADK model instance
+    """
+    if os.getenv("LLM_BACKEND", "gemini") == "fake":
+        return FakeLlm.from_env()
+    retries = int(os.getenv("RATE_LIMIT_RETRIES", "8"))
+    return Gemini(model=LLM_MODEL, retry_options=types.HttpRetryOptions(attempts=retries + 1))
+
+
+def build_llm_limiter() -> RateLimiter:
+    """
+    Build the limiter of LLM requests (``LLM_RPM`` requests per minute per API key if set).
+    
+    Returns:
+        RateLimiter whose buckets are shared by all jobs on the host
+    """
+    llm_rpm = os.getenv("LLM_RPM")
+    return RateLimiter(float(llm_rpm) if llm_rpm else None)
+
+
+def build_model_callbacks() -> Dict[str, Any]:
+    """
+    Build agent model callbacks that send every LLM call through the shared rate limiter.
+    
+    Calls wait for a token from the bucket of the current API key (shared by
+    all jobs on the host, ``LLM_RPM`` requests per minute if set). Retries
+    are left to the model's client (see build_llm); a quota error that
+    reaches the agent blocks the bucket for everyone for the server-suggested
+    delay, so other jobs back off too.
+    
+    Returns:
+        Keyword arguments for Agent
+    """
+    limiter = build_llm_limiter()
+    key = bucket_key("llm", os.getenv("GOOGLE_API_KEY"))
+    
+    async def before_model(callback_context, llm_request):
+        await asyncio.to_thread(limiter.acquire, key)
+        return None
+    
+    async def on_model_error(callback_context, llm_request, error):
+        if is_rate_limit_error(error):
+            print("LLM quota exhausted, backing off")
+            limiter.backoff(key, retry_delay(error))
+        # Let the error surface
+        return None
+    
+    return {
+        "before_model_callback": before_model,
+        "on_model_error_callback": on_model_error
+    }
+
+
+def build_audio_config() -> AudioConfig:
+    """
+    Build the audio configuration, applying optional environment overrides.
+    
+    Returns:
+        AudioConfig for the audio generation and mixing stage
+    """
+    audio_config = AudioConfig()
+    audio_config.tts_backend = os.getenv("TTS_BACKEND", audio_config.tts_backend)
+    audio_config.tts_min_chars = max(0, int(os.getenv("TTS_MIN_CHARS", audio_config.tts_min_chars)))
+    audio_config.tts_max_chars = max(0, int(os.getenv("TTS_MAX_CHARS", audio_config.tts_max_chars)))
+    max_workers = os.getenv("TTS_MAX_WORKERS")
+    if max_workers:
+        audio_config.max_workers = max(1, int(max_workers))
+    audio_config.concurrency = os.getenv("TTS_CONCURRENCY", audio_config.concurrency)
+    max_concurrency = os.getenv("TTS_MAX_CONCURRENCY")
+    if max_concurrency:
+        audio_config.max_concurrency = max(1, int(max_concurrency))
+    batch_chars = os.getenv("TTS_BATCH_CHARS")
+    if batch_chars:
+        audio_config.tts_batch_chars = max(0, int(batch_chars))
+    batch_lines = os.getenv("TTS_BATCH_LINES")
+    if batch_lines:
+        audio_config.tts_batch_lines = max(1, int(batch_lines))
+    # TTS cache is shared by all jobs on the host; set TTS_CACHE_DIR="" to disable
+    audio_config.cache_dir = os.getenv("TTS_CACHE_DIR", "cache/tts") or None
+    cache_max_mb = os.getenv("TTS_CACHE_MAX_MB")
+    if cache_max_mb:
+        audio_config.cache_max_bytes = int(cache_max_mb) * 1024 * 1024
+    tts_rpm = os.getenv("TTS_RPM")
+    if tts_rpm:
+        audio_config.tts_requests_per_minute = float(tts_rpm)
+    audio_config.rate_limit_retries = int(os.getenv("RATE_LIMIT_RETRIES", audio_config.rate_limit_retries))
+    audio_config.segment_retries = max(0, int(os.getenv("SEGMENT_RETRIES", audio_config.segment_retries)))
+    audio_config.pipeline = os.getenv("AUDIO_PIPELINE", audio_config.pipeline)
+    audio_config.segment_format = os.getenv("SEGMENT_FORMAT", audio_config.segment_format)
+    output_sample_rate = os.getenv("OUTPUT_SAMPLE_RATE")
+    if output_sample_rate is not None:
+        # "" keeps the sample rate of the mix
+        audio_config.output_sample_rate = int(output_sample_rate) if output_sample_rate else None
+    audio_config.mix_engine = os.getenv("MIX_ENGINE", audio_config.mix_engine)
+    audio_config.loudness_mode = os.getenv("LOUDNESS_MODE", audio_config.loudness_mode)
+    if audio_config.pipeline == "stream" and audio_config.loudness_mode in ("mix", "speaker"):
+        print(f'LOUDNESS_MODE={audio_config.loudness_mode} needs the whole mix, which the stream pipeline '
+              f'never holds; normalizing each segment ("segment" mode) instead')
+        audio_config.loudness_mode = "segment"
+    audio_config.encoder = os.getenv("MP3_ENCODER", audio_config.encoder)
+    # The MP3 rendition is always produced; it backs the player and download button
+    profiles = [name.strip() for name in os.getenv("OUTPUT_PROFILES", "mp3").split(",") if name.strip()]
+    unknown = [name for name in profiles if name not in OUTPUT_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown output profiles: {', '.join(unknown)}")
+    audio_config.output_profiles = ["mp3"] + [name for name in profiles if name != "mp3"]
+    encode_workers = os.getenv("MP3_ENCODE_WORKERS")
+    if encode_workers:
+        audio_config.encode_workers = max(1, int(encode_workers))
+    return audio_config
+
 
 def generate_audio_segments(enhanced_script: str) -> Dict[str, Any]:
     """
@@ -156,8 +460,13 @@ def generate_audio_segments(enhanced_script: str) -> Dict[str, Any]:
         segments_dir = _audio_context.get('segments_dir', 'outputs/segments')
         final_dir = _audio_context.get('final_dir', 'outputs/podcast')
         
+        audio_config = build_audio_config()
+        if os.getenv("MIX_BUFFER", "memory") == "mmap":
+            # Scratch file lives in the job's outputs/<timestamp>/ directory
+            audio_config.scratch_dir = os.path.dirname(os.path.abspath(final_dir))
+        
         # Initialize audio generator
-        audio_generator = PodcastAudioGenerator(output_dir=segments_dir)
+        audio_generator = PodcastAudioGenerator(output_dir=segments_dir, audio_config=audio_config)
         
         # Add voices using Google TTS prebuilt voices
         # Available voices: Kore, Puck, Charon, Fenrir, Kore (male), Puck (female), etc.
@@ -190,21 +499,92 @@ def generate_audio_segments(enhanced_script: str) -> Dict[str, Any]:
         if not dialogue_list:
             raise ValueError("No valid dialogue found in script")
         
-        # Generate audio segments
-        audio_files = audio_generator.generate_audio(dialogue_list)
+        # Save the script before synthesis: a resumed job reads it back instead
+        # of running the agents again, so its lines hash to the manifest entries
+        data_dir = _audio_context.get('data_dir')
+        if data_dir:
+            with open(os.path.join(data_dir, ENHANCED_SCRIPT_FILE), 'w') as f:
+                json.dump({"dialogue": dialogue_list}, f, indent=2)
+        
+        podcast_mixer = PodcastMixer(output_dir=final_dir, audio_config=audio_config)
         
-        if not audio_files:
-            raise ValueError("No audio files were generated")
+        profiles = None
+        live_dir = _audio_context.get('live_dir')
+        on_live_playlist = _audio_context.get('on_live_playlist')
+        live_preview = None
+        segment_count = 0
         
-        # Mix audio
-        podcast_mixer = PodcastMixer(output_dir=final_dir)
-        final_podcast_path = podcast_mixer.mix_audio(audio_files)
+        def live_segment(segment):
+            # Called with each segment in dialogue order as soon as it is ready
+            nonlocal segment_count
+            segment_count += 1
+            if live_preview:
+                live_preview.add(segment)
+            if segment_count == 1 and live_dir and on_live_playlist:
+                # The player keeps retrying until the first HLS segment is written
+                on_live_playlist(os.path.relpath(live_profile.filename, STATIC_DIR))
+        
+        if live_dir:
+            live_profile = OUTPUT_PROFILES["live"].model_copy(
+                update={"filename": os.path.join(live_dir, "podcast.m3u8")}
+            )
+            profiles = [OUTPUT_PROFILES[name] for name in audio_config.output_profiles if name != "live"]
+            if audio_config.pipeline == "stream":
+                profiles.append(live_profile)
+            else:
+                # The configured pipeline makes the final mix; the playlist is
+                # mixed alongside it from the segments as they are synthesized
+                live_preview = LivePreview(podcast_mixer, live_profile)
+        
+        if audio_config.pipeline == "stream":
+            # Mix and encode each segment as soon as it and all earlier ones are synthesized
+            def counted_segments():
+                for segment in audio_generator.iter_audio_pcm(dialogue_list):
+                    live_segment(segment)
+                    yield segment
+            
+            try:
+                outputs = podcast_mixer.stream_profiles(counted_segments(), profiles)
+            except ValueError:
+                if segment_count:
+                    raise
+                raise ValueError("No audio files were generated")
+            audio_files = []
+        else:
+            # Generate audio segments
+            try:
+                if audio_config.pipeline == "memory":
+                    # Keep segments as PCM in memory; only the final mix is encoded
+                    segments = audio_generator.generate_audio_pcm(dialogue_list, on_segment=live_segment)
+                    audio_files = []
+                else:
+                    segments = audio_generator.generate_audio(dialogue_list, on_segment=live_segment)
+                    audio_files = segments
+            finally:
+                if live_preview:
+                    live_preview.close()
+            
+            if not segments:
+                raise ValueError("No audio files were generated")
+            
+            # Mix audio once and encode every output profile from the mix
+            outputs = podcast_mixer.mix_profiles(segments, profiles)
+            segment_count = len(segments)
+        final_podcast_path = outputs["mp3"]
         
         return {
             "status": "success",
             "final_podcast": final_podcast_path,
+            "outputs": outputs,
             "segment_files": audio_files,
-            "message": f"Audio generation successful! Generated {len(audio_files)} segments. Final podcast saved to: {final_podcast_path}"
+            "tts_cache": audio_generator.cache.stats() if audio_generator.cache else None,
+            "tts_concurrency": audio_generator.concurrency.stats() if audio_generator.concurrency else None,
+            "client_pool": CLIENT_POOL.stats(),
+            # Dialogue lines whose audio is missing, mapped back through the re-chunking
+            "failed_segments": sorted({
+                index for entry in audio_generator.manifest.failures() for index in entry["source_indices"]
+            }),
+            "message": f"Audio generation successful! Generated {segment_count} segments. Final podcast saved to: {final_podcast_path}"
         }
     except Exception as e:
         error_msg = str(e)
@@ -215,13 +595,25 @@ def generate_audio_segments(enhanced_script: str) -> Dict[str, Any]:
         }
 
 
-def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str]:
+def generate_podcast(
+    pdf_file_path: Optional[str],
+    progress_callback=None,
+    job_id: Optional[str] = None,
+    live_callback: Optional[Callable[[str], None]] = None
+) -> Optional[str]:
     """
     Generate a podcast from a research paper PDF using Google ADK multi-agent system.
     
     Args:
-        pdf_file_path: Path to the PDF file
+        pdf_file_path: Path to the PDF file (may be None when resuming a job
+            whose enhanced script was saved)
         progress_callback: Optional function to call with progress updates
+        job_id: Job to create or resume; if its enhanced script was saved, the
+            agents are skipped and only segments not recorded as finished in
+            its segments/manifest.json are synthesized
+        live_callback: Optional function called with the live HLS playlist path
+            (relative to the static directory) once audio synthesis starts;
+            the playlist grows while the rest of the podcast is generated
         
     Returns:
         Path to the generated podcast audio file, or None if generation failed
@@ -230,15 +622,7 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
         # Setup directories
         if progress_callback:
             progress_callback("Setting up directories...")
-        dirs = setup_directories()
-        
-        # Extract text from PDF
-        if progress_callback:
-            progress_callback("Extracting text from PDF...")
-        paper_text = extract_text_from_pdf(pdf_file_path)
-        
-        # Limit text length for API
-        paper_text_limited = paper_text[:50000] if len(paper_text) > 50000 else paper_text
+        dirs = setup_directories(job_id)
         
         # Initialize audio context
         global _audio_context
@@ -247,16 +631,54 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             'final_dir': dirs['FINAL'],
             'data_dir': dirs['DATA']
         }
+        if live_callback:
+            prune_live_dirs()
+            _audio_context['live_dir'] = os.path.join(LIVE_DIR, secrets.token_urlsafe(16))
+            _audio_context['on_live_playlist'] = live_callback
+        
+        # A resumed job whose audio stage already started goes straight back to
+        # it with the saved script; the agents would write a different one
+        enhanced_script_path = os.path.join(dirs['DATA'], ENHANCED_SCRIPT_FILE)
+        if job_id and os.path.exists(enhanced_script_path):
+            if progress_callback:
+                progress_callback("Resuming audio generation from the saved script...")
+            with open(enhanced_script_path, 'r') as f:
+                audio_result = generate_audio_segments(f.read())
+            if audio_result.get('status') != 'success':
+                raise RuntimeError(audio_result['message'])
+            if progress_callback:
+                progress_callback("Podcast generation complete!")
+            return audio_result['final_podcast']
+        if not pdf_file_path:
+            raise ValueError(f"Job {job_id} has no saved script to resume; upload the PDF again")
+        
+        # Extract text from PDF
+        if progress_callback:
+            progress_callback("Extracting text from PDF...")
+        # Pages past PDF_MAX_CHARS are not read
+        paper_text = extract_text_from_pdf(
+            pdf_file_path,
+            max_chars=int(os.getenv("PDF_MAX_CHARS", PDF_MAX_CHARS))
+        )
+        
+        # Strip extraction noise, then keep the sections that matter
+        # within the prompt token budget
+        paper_text = clean_paper_text(paper_text)
+        paper_text_limited = select_paper_context(paper_text)
         
         # Create audio generation tool
         audio_tool = FunctionTool(generate_audio_segments)
         
+        # Shared rate limiting for all agent LLM calls
+        model_callbacks = build_model_callbacks()
+        llm = build_llm()
+        
         # Step 1: Research Analyst Agent
         if progress_callback:
             progress_callback("Initializing research analyst agent...")
         research_analyst = Agent(
             name="ResearchAnalyst",
-            model="gemini-2.0-flash-exp",
+            model=llm,
             instruction="""You're a PhD researcher with a talent for breaking down complex
             academic papers into clear, understandable summaries. You excel at identifying
             key findings and their real-world implications. 
@@ -279,7 +701,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             - summary_date: Current date in ISO format (use: {datetime.now().isoformat()})
             
             Format your response as valid JSON only, no additional text.""",
-            output_key="paper_summary"
+            output_key="paper_summary",
+            **model_callbacks
         )
         
         # Step 2: Research Support Agent
@@ -287,7 +710,7 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             progress_callback("Initializing research support agent...")
         research_support = Agent(
             name="ResearchSupport",
-            model="gemini-2.0-flash-exp",
+            model=llm,
             instruction="""You're a versatile research assistant who excels at finding 
             supplementary information across academic fields. You have a talent for 
             connecting academic research with real-world applications, current events, 
@@ -306,7 +729,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             Provide a structured collection of relevant supporting materials, examples, 
             and context that would enhance understanding of the research topic.
             Format your response as a clear, organized text with sections.""",
-            output_key="supporting_research"
+            output_key="supporting_research",
+            **model_callbacks
         )
         
         # Step 3: Script Writer Agent
@@ -314,7 +738,7 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             progress_callback("Initializing script writer agent...")
         script_writer = Agent(
             name="ScriptWriter",
-            model="gemini-2.0-flash-exp",
+            model=llm,
             instruction="""You're a skilled podcast writer who specializes in making technical 
             content engaging and accessible. You create natural dialogue between two hosts: 
             Dennis (a knowledgeable expert who explains concepts clearly) and Sarah (an informed 
@@ -341,7 +765,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             
             Format your response as valid JSON only, with this exact structure:
             {{"dialogue": [{{"speaker": "Dennis", "text": "..."}}, {{"speaker": "Sarah", "text": "..."}}]}}""",
-            output_key="podcast_script"
+            output_key="podcast_script",
+            **model_callbacks
         )
         
         # Step 4: Script Enhancer Agent
@@ -349,7 +774,7 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             progress_callback("Initializing script enhancer agent...")
         script_enhancer = Agent(
             name="ScriptEnhancer",
-            model="gemini-2.0-flash-exp",
+            model=llm,
             instruction="""You're a veteran podcast producer who specializes in making technical 
             content both entertaining and informative. You excel at adding natural humor, 
             relatable analogies, and engaging banter while ensuring the core technical content 
@@ -373,7 +798,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             {{"dialogue": [{{"speaker": "Dennis", "text": "..."}}, {{"speaker": "Sarah", "text": "..."}}]}}
             
             Format your response as valid JSON only.""",
-            output_key="enhanced_script"
+            output_key="enhanced_script",
+            **model_callbacks
         )
         
         # Step 5: Audio Generator Agent
@@ -381,7 +807,7 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             progress_callback("Initializing audio generator agent...")
         audio_generator_agent = Agent(
             name="AudioGenerator",
-            model="gemini-2.0-flash-exp",
+            model=llm,
             instruction="""You are responsible for generating the final podcast audio.
             
             You have access to the enhanced podcast script from the previous step: {enhanced_script}
@@ -397,7 +823,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             The function will return a dictionary with status, final_podcast path, and other details.
             Report the final_podcast path if the status is "success", or report the error if status is "error".""",
             tools=[audio_tool],
-            output_key="audio_result"
+            output_key="audio_result",
+            **model_callbacks
         )
         
         # Create Sequential Agent workflow
@@ -502,8 +929,8 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
             except Exception as e:
                 print(f"Error saving script: {e}")
         
-        if 'enhanced_script' in state:
-            enhanced_script_path = os.path.join(dirs['DATA'], "enhanced_podcast_script.json")
+        # The audio stage saves the script it synthesized, which resumes rely on
+        if 'enhanced_script' in state and not os.path.exists(enhanced_script_path):
             try:
                 enhanced_text = state.get('enhanced_script', '') if isinstance(state, dict) else getattr(state, 'enhanced_script', '')
                 if enhanced_text.strip().startswith('{'):
@@ -583,7 +1010,6 @@ def generate_podcast(pdf_file_path: str, progress_callback=None) -> Optional[str
         
         if not enhanced_script_text:
             # Try to get from saved file
-            enhanced_script_path = os.path.join(dirs['DATA'], "enhanced_podcast_script.json")
             if os.path.exists(enhanced_script_path):
                 with open(enhanced_script_path, 'r') as f:
                     enhanced_script_data = json.load(f)
@@ -1019,6 +1445,72 @@ def show_auth_ui():
 # STREAMLIT UI
 # ============================================================================
 
+def live_playback_enabled() -> bool:
+    """
+    Check whether the live player is offered.
+    
+    Live playback is opt-in (LIVE_PLAYBACK=1), since it mixes and encodes the
+    podcast a second time, and needs Streamlit static serving and the
+    vendored hls.js.
+    """
+    return (
+        os.getenv("LIVE_PLAYBACK", "0") == "1"
+        and bool(st.get_option("server.enableStaticServing"))
+        and os.path.exists(os.path.join(STATIC_DIR, HLS_JS_FILE))
+    )
+
+
+def static_url(path: str) -> str:
+    """Get the URL of a file in the static directory (served at app/static/)."""
+    base_path = st.get_option("server.baseUrlPath").strip("/")
+    return "/" + "/".join(part for part in (base_path, "app/static", path) if part)
+
+
+@lru_cache(maxsize=1)
+def hls_js_source() -> str:
+    """
+    Get the vendored hls.js for an inline script tag.
+    
+    The player inlines it rather than loading it from app/static/: older
+    Streamlit releases serve static .js files as text/plain with nosniff,
+    which browsers refuse to run.
+    """
+    with open(os.path.join(STATIC_DIR, HLS_JS_FILE), encoding="utf-8") as f:
+        return re.sub(r"</(script)", r"<\\/\1", f.read(), flags=re.IGNORECASE)
+
+
+def render_live_player(playlist: str) -> None:
+    """
+    Render an HLS player for a live playlist that is still growing.
+    
+    Args:
+        playlist: Playlist path relative to the static directory
+    """
+    url = static_url(playlist)
+    components.html(f"""
+        <audio id="live" controls style="width: 100%"></audio>
+        <script>{hls_js_source()}</script>
+        <script>
+            const audio = document.getElementById("live");
+            const src = {json.dumps(url)};
+            if (window.Hls && Hls.isSupported()) {{
+                // Start from the beginning and keep retrying until the first segment is written
+                const retry = {{maxNumRetry: 60, retryDelayMs: 1000, maxRetryDelayMs: 2000}};
+                const hls = new Hls({{
+                    startPosition: 0,
+                    manifestLoadPolicy: {{default: {{
+                        maxTimeToFirstByteMs: 10000, maxLoadTimeMs: 20000, timeoutRetry: retry, errorRetry: retry
+                    }}}}
+                }});
+                hls.loadSource(src);
+                hls.attachMedia(audio);
+            }} else if (audio.canPlayType("application/vnd.apple.mpegurl")) {{
+                audio.src = src;
+            }}
+        </script>
+    """, height=60)
+
+
 # Streamlit UI
 def main():
     """Main Streamlit application."""
@@ -1115,8 +1607,80 @@ def main():
     if api_key.strip():
         st.sidebar.success("✅ API Key configured")
     
+    # Live player of a running job, shown above the finished podcast
+    live_placeholder = st.empty()
+    
+    # The running job's id is kept in the URL (?job=...), so after a reload
+    # or a server restart its audio stage can be resumed
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    job_param = query_params.get('job')
+    if job_param and JOB_ID_PATTERN.match(job_param):
+        st.session_state.job_id = job_param
+    
+    def run_generation(pdf_path: Optional[str], job_id: str):
+        """Generate (or resume) a podcast, showing progress and the live player."""
+        # Verify API key is still set
+        if not st.session_state.google_api_key or not os.getenv("GOOGLE_API_KEY"):
+            st.error("❌ Google API Key is required! Please enter it in the sidebar.")
+            st.stop()
+        
+        st.session_state.job_id = job_id
+        st.query_params['job'] = job_id
+        st.session_state.status = "Generating podcast..."
+        st.session_state.podcast_path = None
+        
+        # Create a placeholder for status updates
+        status_placeholder = st.empty()
+        progress_bar = st.progress(0)
+        
+        try:
+            # Generate podcast with progress callback
+            def progress_callback(message):
+                status_placeholder.text(f"Status: {message}")
+            
+            # Start playback as soon as the first lines are synthesized
+            def live_callback(playlist):
+                with live_placeholder.container():
+                    st.caption("🔴 Listen now - the rest of the podcast is still being generated")
+                    render_live_player(playlist)
+            
+            podcast_path = generate_podcast(
+                pdf_path,
+                progress_callback=progress_callback,
+                job_id=job_id,
+                live_callback=live_callback if live_playback_enabled() else None
+            )
+            
+            if podcast_path and os.path.exists(podcast_path):
+                st.session_state.podcast_path = podcast_path
+                st.session_state.status = "Podcast generated successfully!"
+                # Finished jobs are not offered for resuming
+                st.session_state.job_id = None
+                del st.query_params['job']
+                progress_bar.progress(100)
+                st.success("Podcast generated successfully!")
+            else:
+                st.error("Failed to generate podcast. Please check the logs for details.")
+                st.session_state.status = "Failed to generate podcast"
+        except Exception as e:
+            st.error(f"Error generating podcast: {str(e)}")
+            st.session_state.status = f"Error: {str(e)}"
+        finally:
+            progress_bar.empty()
+            status_placeholder.empty()
+    
     # Sidebar for file upload
     with st.sidebar:
+        # Offer to finish an interrupted job from its saved script and segments
+        resume_job = st.session_state.job_id
+        if is_resumable_job(resume_job) and not st.session_state.podcast_path:
+            st.header("⏯️ Interrupted Job")
+            st.info(f"Job {resume_job} stopped during audio generation. Resuming only synthesizes the missing segments.")
+            if st.button("Resume Podcast", use_container_width=True):
+                run_generation(None, resume_job)
+            st.divider()
+        
         st.header("📄 Upload PDF")
         uploaded_file = st.file_uploader(
             "Choose a PDF file",
@@ -1138,39 +1702,7 @@ def main():
             
             # Generate button
             if st.button("Generate Podcast", type="primary", use_container_width=True):
-                # Verify API key is still set
-                if not st.session_state.google_api_key or not os.getenv("GOOGLE_API_KEY"):
-                    st.error("❌ Google API Key is required! Please enter it in the sidebar.")
-                    st.stop()
-                else:
-                    st.session_state.status = "Generating podcast..."
-                    st.session_state.podcast_path = None
-                    
-                    # Create a placeholder for status updates
-                    status_placeholder = st.empty()
-                    progress_bar = st.progress(0)
-                    
-                    try:
-                        # Generate podcast with progress callback
-                        def progress_callback(message):
-                            status_placeholder.text(f"Status: {message}")
-                        
-                        podcast_path = generate_podcast(pdf_path, progress_callback=progress_callback)
-                        
-                        if podcast_path and os.path.exists(podcast_path):
-                            st.session_state.podcast_path = podcast_path
-                            st.session_state.status = "Podcast generated successfully!"
-                            progress_bar.progress(100)
-                            st.success("Podcast generated successfully!")
-                        else:
-                            st.error("Failed to generate podcast. Please check the logs for details.")
-                            st.session_state.status = "Failed to generate podcast"
-                    except Exception as e:
-                        st.error(f"Error generating podcast: {str(e)}")
-                        st.session_state.status = f"Error: {str(e)}"
-                    finally:
-                        progress_bar.empty()
-                        status_placeholder.empty()
+                run_generation(pdf_path, new_job_id())
     
     # Main content area
     if st.session_state.podcast_path and os.path.exists(st.session_state.podcast_path):
@@ -1190,6 +1722,18 @@ def main():
             mime="audio/mp3",
             use_container_width=True
         )
+        
+        # Smaller rendition for mobile listeners, if it was produced
+        mobile_path = os.path.join(os.path.dirname(st.session_state.podcast_path), OUTPUT_PROFILES["opus"].filename)
+        if os.path.exists(mobile_path):
+            with open(mobile_path, "rb") as mobile_file:
+                st.download_button(
+                    label="Download Mobile Version (Opus)",
+                    data=mobile_file.read(),
+                    file_name=f"podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.opus",
+                    mime="audio/ogg",
+                    use_container_width=True
+                )
     elif st.session_state.status and "Error" in st.session_state.status:
         st.error(st.session_state.status)
     else:
@@ -1224,12 +1768,14 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] != "run":
         # Original command-line mode (for backward compatibility)
         pdf_path = sys.argv[1] if len(sys.argv) > 1 else "AgentQuality.pdf"
+        # Optional job id (outputs/<job_id>) to resume an interrupted run
+        job_id = sys.argv[2] if len(sys.argv) > 2 else None
         print(f"Generating podcast from {pdf_path}...")
         
         def print_progress(message):
             print(f"Progress: {message}")
         
-        result = generate_podcast(pdf_path, progress_callback=print_progress)
+        result = generate_podcast(pdf_path, progress_callback=print_progress, job_id=job_id)
         if result:
             print(f"Podcast generated successfully: {result}")
         else:
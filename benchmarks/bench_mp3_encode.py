@@ -0,0 +1,70 @@
+"""
+Benchmark the final podcast encode: single ffmpeg process vs. parallel chunks.
+
+Usage:
+    python benchmarks/bench_mp3_encode.py --minutes 30 --workers 2
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import AudioConfig, PCMSegment, PodcastMixer  # noqa: E402
+
+
+def synthetic_speech(minutes: float, frame_rate: int) -> np.ndarray:
+    """Noise shaped by a syllable-rate envelope, roughly speech-like for the encoder."""
+    rng = np.random.default_rng(0)
+    frames = int(minutes * 60 * frame_rate)
+    t = np.arange(frames) / frame_rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) * np.sin(2 * np.pi * 0.25 * t)
+    tone = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+    signal = (0.6 * tone + 0.4 * rng.standard_normal(frames)) * envelope * 6000
+    return signal.astype(np.int16).reshape(-1, 1)
+
+
+def decoded_frames(path: str) -> int:
+    """Count the samples ffmpeg decodes from an MP3, after gapless trimming."""
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "pipe:1"],
+        stdout=subprocess.PIPE, check=True
+    )
+    return len(result.stdout) // 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30.0, help="Length of the test podcast")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel encoder processes")
+    parser.add_argument("--sample-rate", type=int, default=24000, help="Sample rate of the mix")
+    args = parser.parse_args()
+
+    samples = synthetic_speech(args.minutes, args.sample_rate)
+    # A single segment, so mix_audio time is almost entirely the encode
+    segment = PCMSegment(index=0, speaker="Bench", pcm=samples.tobytes(), sample_rate=args.sample_rate)
+    print(f"{args.minutes:g} min mix at {args.sample_rate} Hz, {args.workers} workers, {os.cpu_count()} CPUs")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = {}
+        for encoder in ("single", "parallel"):
+            config = AudioConfig(encoder=encoder, encode_workers=args.workers, normalize=False)
+            mixer = PodcastMixer(os.path.join(output_dir, encoder), audio_config=config)
+            start = time.perf_counter()
+            output_file = mixer.mix_audio([segment])
+            elapsed = time.perf_counter() - start
+            results[encoder] = elapsed
+            print(
+                f"{encoder:>8}: {elapsed:6.2f} s, {os.path.getsize(output_file) / 1e6:6.2f} MB, "
+                f"{decoded_frames(output_file)} decoded samples"
+            )
+        print(f" speedup: {results['single'] / results['parallel']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
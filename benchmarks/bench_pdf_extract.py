@@ -0,0 +1,185 @@
+"""
+Benchmark the PDF extraction engines on a corpus of sample papers.
+
+Each engine runs in its own process so its peak memory is measured on its
+own. Reports pages per second, peak RSS and text quality: words per page,
+share of tokens that look like words (garbled glyphs and merged or split
+words lower it) and word-level agreement (F1) with the reference engine.
+Extraction goes through pdf_extract.extract_text, serially and uncached.
+
+Usage:
+    python benchmarks/bench_pdf_extract.py papers/*.pdf
+    python benchmarks/bench_pdf_extract.py papers/ --engines pypdf2,pypdfium2 --runs 3
+    python benchmarks/bench_pdf_extract.py --sample-pages 20,100,300
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import subprocess
+from collections import Counter
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_engines import ENGINES, available_engines  # noqa: E402
+
+WORD = re.compile(r"^[(\"']?[A-Za-z]+(?:[-'][A-Za-z]+)*[)\"'.,;:!?]*$")
+TOKEN = re.compile(r"[A-Za-z]+")
+
+SAMPLE_WORDS = (
+    "model results data training evaluation benchmark agents researchers paper method "
+    "approach baseline accuracy quality latency system users analysis experiment findings "
+    "representation objective transformer attention dataset generalization"
+).split()
+
+
+def sample_pdf(path: str, pages: int) -> None:
+    """Write a paper-like PDF: running header, hyphenated prose, a table row and a page number per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for number in range(pages):
+        lines = ["Journal of Benchmark Studies - Extraction Engines"]
+        for line in range(45):
+            words = [SAMPLE_WORDS[(number * 7 + line * 3 + i) % len(SAMPLE_WORDS)] for i in range(11)]
+            lines.append(" ".join(words) + (" experi-" if line % 9 == 0 else ""))
+            if line % 9 == 0:
+                lines.append("ments confirm the " + " ".join(words[:6]))
+        lines += ["0.91 0.87 0.78 12.4 3.2", str(number + 1)]
+        body = " ".join(f"({line}) '" for line in lines)
+        stream = f"BT /F1 9 Tf 60 770 Td 11 TL {body} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def collect_corpus(paths: List[str]) -> List[str]:
+    """Expand files and directories into a sorted list of PDF files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(root, name) for root, _, names in os.walk(path)
+                      for name in names if name.lower().endswith(".pdf")]
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def run_engine(engine: str, files: List[str], runs: int, output: str) -> None:
+    """Extract every file with one engine (in a child process) and write timings and texts as JSON."""
+    from pdf_engines import get_engine
+    from pdf_extract import PAGE_BREAK, extract_text
+
+    results = []
+    for path in files:
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            text = extract_text(path, workers=1, engine=engine)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({"file": path, "pages": text.count(PAGE_BREAK) + 1, "seconds": best, "text": text})
+    with open(output, "w") as f:
+        json.dump({
+            "engine": engine,
+            "version": get_engine(engine).version,
+            # Kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "results": results,
+        }, f)
+
+
+def word_share(text: str) -> float:
+    """Share of whitespace-separated tokens that look like words."""
+    tokens = text.split()
+    return sum(1 for token in tokens if WORD.match(token)) / len(tokens) if tokens else 0.0
+
+
+def agreement(text: str, reference: str) -> float:
+    """Word-level F1 of a text against a reference text."""
+    words, expected = Counter(TOKEN.findall(text.lower())), Counter(TOKEN.findall(reference.lower()))
+    overlap = sum((words & expected).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(words.values()), overlap / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="PDF files or directories (default: generated sample papers)")
+    parser.add_argument("--engines", default=None, help="Comma-separated engines (default: all installed)")
+    parser.add_argument("--reference", default=None, help="Engine whose text the others are compared to")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per file; the fastest counts")
+    parser.add_argument("--sample-pages", default="10,50,200", help="Page counts of the generated sample papers")
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    files = collect_corpus(args.paths)
+    if args.worker:
+        run_engine(args.worker[0], files, args.runs, args.worker[1])
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+    if not files:
+        for pages in (int(count) for count in args.sample_pages.split(",")):
+            path = os.path.join(work_dir, f"sample_{pages:04d}p.pdf")
+            sample_pdf(path, pages)
+            files.append(path)
+
+    engines = args.engines.split(",") if args.engines else available_engines()
+    missing = [engine for engine in engines if engine not in available_engines()]
+    if missing:
+        print(f"Skipping engines that are not installed or unknown: {', '.join(missing)} "
+              f"(known: {', '.join(ENGINES)})")
+        engines = [engine for engine in engines if engine not in missing]
+    if not engines:
+        return
+
+    reports: Dict[str, dict] = {}
+    for engine in engines:
+        output = os.path.join(work_dir, f"{engine}.json")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", engine, output, "--runs", str(args.runs)]
+        process = subprocess.run(command + files, capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"{engine} failed:\n{process.stderr.strip()}")
+            continue
+        with open(output) as f:
+            reports[engine] = json.load(f)
+
+    reference = args.reference or next(iter(reports), None)
+    reference_texts = {item["file"]: item["text"] for item in reports.get(reference, {}).get("results", [])}
+
+    print(f"{len(files)} file(s), reference engine for agreement: {reference}")
+    print(f"{'engine':<24} {'pages':>6} {'pages/s':>9} {'peak MB':>8} {'words/page':>11} {'word-like':>10} {'F1 vs ref':>10}")
+    for engine, report in reports.items():
+        results = report["results"]
+        pages = sum(item["pages"] for item in results)
+        seconds = sum(item["seconds"] for item in results)
+        text = "".join(item["text"] for item in results)
+        f1 = [agreement(item["text"], reference_texts[item["file"]]) for item in results if item["file"] in reference_texts]
+        print(f"{report['version']:<24} {pages:>6} {pages / seconds if seconds else 0:>9.1f} "
+              f"{report['peak_rss_mb']:>8.1f} {len(text.split()) / max(1, pages):>11.1f} "
+              f"{word_share(text):>10.1%} {sum(f1) / len(f1) if f1 else 0:>10.3f}")
+    print(f"Texts and timings in {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the podcast pipeline offline with the fake TTS and LLM backends.
+
+Runs the full generate_podcast flow (PDF extraction, agents, TTS, mixing,
+encoding) or only the audio stage, with no network access or API quota.
+
+Usage:
+    python benchmarks/bench_pipeline.py --lines 40 --tts-latency 0.5 --runs 3
+    python benchmarks/bench_pipeline.py --stage audio --lines 200 --error-rate 0.05
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def minimal_pdf(path: str, text: str) -> None:
+    """Write a one-page PDF with a single line of text."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stage", choices=["full", "audio"], default="full", help="Whole flow or audio stage only")
+    parser.add_argument("--lines", type=int, default=40, help="Dialogue lines in the canned script")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="Fake TTS seconds per request")
+    parser.add_argument("--tts-latency-per-char", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake TTS HTTP 503 probability")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fake TTS HTTP 429 probability")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM seconds per call")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.update({
+        "TTS_BACKEND": "fake",
+        "LLM_BACKEND": "fake",
+        "FAKE_TTS_LATENCY": str(args.tts_latency),
+        "FAKE_TTS_LATENCY_PER_CHAR": str(args.tts_latency_per_char),
+        "FAKE_TTS_ERROR_RATE": str(args.error_rate),
+        "FAKE_TTS_429_RATE": str(args.rate_limit_rate),
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_SCRIPT_LINES": str(args.lines),
+        # Every run synthesizes from scratch, with its own rate limit store
+        "TTS_CACHE_DIR": "",
+        "RATE_LIMIT_DB": os.path.join(work_dir, "ratelimit.db"),
+        "LIVE_PLAYBACK": "0",
+    })
+    os.chdir(work_dir)
+
+    import app  # noqa: E402 - reads the environment set above
+    from fake_backends import canned_dialogue  # noqa: E402
+
+    pdf_path = os.path.join(work_dir, "paper.pdf")
+    minimal_pdf(pdf_path, "Offline benchmark paper")
+    script = json.dumps(canned_dialogue(args.lines))
+
+    timings = []
+    for run in range(args.runs):
+        start = time.perf_counter()
+        if args.stage == "full":
+            # Each run gets its own job directory
+            job_id = f"bench_{run:03d}"
+            result = app.generate_podcast(pdf_path, job_id=job_id)
+        else:
+            app._audio_context = {
+                "segments_dir": os.path.join(work_dir, f"run_{run:03d}", "segments"),
+                "final_dir": os.path.join(work_dir, f"run_{run:03d}", "podcast"),
+            }
+            outcome = app.generate_audio_segments(script)
+            if outcome["status"] != "success":
+                raise RuntimeError(outcome["error"])
+            result = outcome["final_podcast"]
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        print(f"run {run}: {elapsed:.2f}s -> {result}")
+
+    best = min(timings)
+    print(f"{args.stage} stage, {args.lines} lines: best {best:.2f}s, "
+          f"mean {sum(timings) / len(timings):.2f}s over {args.runs} run(s)")
+    print(f"Outputs in {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Check that the paper text sent to the agents loses its publication stamps.
+
+Feeds a generated multi-page paper through app.clean_paper_text and
+app.select_paper_context, with and without TEXT_CLEANUP, and checks that
+a copyright footer at a mid-paper page edge is dropped while the same
+words in body text are kept and no page breaks reach the prompt. Also
+runs text_cleanup.clean_text on short snippets: words split at a line end
+are rejoined without the hyphen, compounds keep theirs, and short or
+continued lines of digits and symbols are kept while table rows are not.
+
+Usage:
+    python benchmarks/check_paper_context.py
+"""
+import os
+import sys
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FOOTER = "Copyright 2023 by the authors. All rights reserved."
+BODY_MENTION = "Copyright 2023 rules changed how the corpus could be shared, so we re-collected it."
+
+SAMPLE_WORDS = (
+    "agents summarize papers for listeners while hosts discuss findings with examples from practice "
+    "so the argument stays clear and every claim is tied to evidence in the results"
+).split()
+
+# Snippet, text the cleaned snippet must contain, text it must not contain
+CLEANUP_CASES = [
+    ("line-break hyphen dropped", "the experi-\nments confirm it\n", "experiments confirm", "experi-"),
+    ("compound prefix keeps hyphen", "we use self-\nattention layers\n", "self-attention", "selfattention"),
+    ("hyphenated prefix keeps hyphen", "state-of-the-\nart models\n", "state-of-the-art", "theart"),
+    ("known compound keeps hyphen", "it is well-\nknown that\n", "well-known", "wellknown"),
+    ("continued year kept", "collected in 2019-\n2020.\n", "2020.", None),
+    ("short continuation kept", "we used samples\n(n = 1,024).\n", "(n = 1,024).", None),
+    ("measurement kept", "the noise was\n3.2 ± 0.4 dB.\n", "3.2 ± 0.4 dB.", None),
+    ("table row dropped", "Results follow.\n0.91 0.87 0.78 12.4 3.2\n", "Results follow.", "0.91"),
+]
+
+
+def body(page: int, lines: int) -> List[str]:
+    """Distinct prose lines, so none of them repeats across pages like a running header."""
+    return [
+        " ".join(SAMPLE_WORDS[(page * 5 + line * 3 + i) % len(SAMPLE_WORDS)] for i in range(12)) + "."
+        for line in range(lines)
+    ]
+
+
+def sample_text() -> str:
+    """Extracted text of a four-page paper with a running header, page numbers and a mid-paper footer stamp."""
+    from pdf_extract import PAGE_BREAK
+
+    pages = [
+        ["Podcasts From Papers", "A. Author, B. Author", "Abstract"] + body(0, 4) + ["1 Introduction"] + body(1, 4),
+        body(2, 4) + [BODY_MENTION] + body(3, 4) + [FOOTER],
+        ["2 Method"] + body(4, 4) + ["3 Results"] + body(5, 4),
+        ["4 Conclusion"] + body(6, 4) + ["References", "[1] A. Author. Some paper. 2020."],
+    ]
+    return PAGE_BREAK.join(
+        "\n".join(["Journal of Offline Checks"] + lines + [str(number)]) + "\n"
+        for number, lines in enumerate(pages, 1)
+    )
+
+
+def main():
+    os.environ.update({"LLM_BACKEND": "fake", "CONTEXT_SELECTION": "sections"})
+
+    import app  # noqa: E402 - reads the environment set above
+    from pdf_extract import PAGE_BREAK  # noqa: E402
+
+    from text_cleanup import clean_text  # noqa: E402
+
+    failures = []
+    for name, snippet, expected, unexpected in CLEANUP_CASES:
+        cleaned = clean_text(snippet).text
+        passed = expected in cleaned and (unexpected is None or unexpected not in cleaned)
+        print(f"cleanup {name}: {'ok' if passed else 'FAILED ' + repr(cleaned)}")
+        if not passed:
+            failures.append(name)
+
+    for cleanup in ("1", "0"):
+        os.environ["TEXT_CLEANUP"] = cleanup
+        context = app.select_paper_context(app.clean_paper_text(sample_text()))
+        checks = {
+            "footer stamp dropped": FOOTER not in context,
+            "body mention kept": BODY_MENTION in context,
+            "no page breaks": PAGE_BREAK not in context,
+            "references dropped": "[1] A. Author" not in context,
+        }
+        for name, passed in checks.items():
+            print(f"TEXT_CLEANUP={cleanup} {name}: {'ok' if passed else 'FAILED'}")
+            if not passed:
+                failures.append(name)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
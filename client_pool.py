@@ -0,0 +1,137 @@
+"""
+Process-wide registry of google-genai clients.
+TTS calls made with the same API key share one client, so its HTTP
+connections (TLS sessions, connection pool) are reused across segments and
+jobs instead of being opened again for every job.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google import genai
+
+from disk_cache import hash_key
+
+# Most clients kept at once; the least recently used one is dropped beyond this
+DEFAULT_MAX_CLIENTS = 32
+
+# Clients unused for this long are dropped, in seconds
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+
+def _default_factory(api_key: Optional[str]) -> genai.Client:
+    """Create a client for an API key (None reads it from the environment)."""
+    return genai.Client(api_key=api_key) if api_key else genai.Client()
+
+
+class ClientPool:
+    """
+    LRU registry of genai clients keyed by a hash of the API key.
+
+    Dropped clients are not closed explicitly: a caller still holding one
+    can finish its requests, and the connections are released once the
+    client is garbage collected.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = DEFAULT_MAX_CLIENTS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        factory: Callable[[Optional[str]], Any] = _default_factory
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            max_clients: Most clients kept at once
+            idle_timeout: Seconds after which an unused client is dropped
+            factory: Creates a client for an API key
+        """
+        self.max_clients = max(1, max_clients)
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key hash -> (client, last use)
+        self._clients: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        """Drop idle clients and clients beyond max_clients. Caller must hold the lock."""
+        for key, (_, last_used) in list(self._clients.items()):
+            if now - last_used > self.idle_timeout:
+                del self._clients[key]
+                self.evictions += 1
+        while len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, api_key: Optional[str] = None) -> Any:
+        """
+        Get the shared client for an API key, creating it if needed.
+
+        Args:
+            api_key: Google API key (None uses GOOGLE_API_KEY)
+
+        Returns:
+            genai.Client
+        """
+        api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        key = hash_key(api_key or '')[:16]
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self.hits += 1
+                client = entry[0]
+                self._clients.move_to_end(key)
+            else:
+                self.misses += 1
+                client = self.factory(api_key)
+            self._clients[key] = (client, now)
+            self._evict(now)
+            return client
+
+    def clear(self) -> None:
+        """Drop all clients."""
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with the number of clients, hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Pool shared by everything in the process
+CLIENT_POOL = ClientPool(
+    max_clients=int(os.environ.get('GENAI_CLIENT_POOL_SIZE', DEFAULT_MAX_CLIENTS)),
+    idle_timeout=float(os.environ.get('GENAI_CLIENT_IDLE_SECONDS', DEFAULT_IDLE_TIMEOUT))
+)
+
+
+def get_client(api_key: Optional[str] = None) -> Any:
+    """
+    Get the process-wide shared genai client for an API key.
+
+    Args:
+        api_key: Google API key (None uses GOOGLE_API_KEY)
+
+    Returns:
+        genai.Client
+    """
+    return CLIENT_POOL.get(api_key)
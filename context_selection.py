@@ -0,0 +1,350 @@
+"""
+Section-aware selection of the paper text sent to the agents.
+Splits extracted text into sections (abstract, introduction, method,
+results, conclusion, references, appendix ...), drops the reference list
+and publication boilerplate, and fills a token budget by section priority
+instead of keeping only the front of the paper.
+"""
+import re
+import math
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from pdf_extract import CHARS_PER_TOKEN, PAGE_BREAK, estimate_tokens
+from ratelimit import is_rate_limit_error, retry_delay
+
+# Section names and the heading titles that start them, in matching order
+SECTION_HEADINGS: List[Tuple[str, str]] = [
+    ("abstract", r"abstract"),
+    ("introduction", r"introduction|motivation"),
+    ("related_work", r"related work|background|prior work|literature review|preliminaries"),
+    ("method", r"(?:proposed )?(?:methods?|methodology|approach)|materials and methods|our approach"
+               r"|system design|experimental setup"),
+    ("results", r"(?:experimental )?results|experiments|evaluation|empirical evaluation|findings"
+                r"|analysis|ablations?(?: stud(?:y|ies))?"),
+    ("discussion", r"discussion|limitations|future work|broader impacts?|ethic(?:s|al considerations)"),
+    ("conclusion", r"conclusions?|concluding remarks|summary"),
+    ("references", r"references|bibliography|works cited|literature cited"),
+    ("acknowledgments", r"acknowledge?ments?"),
+    ("appendix", r"appendix|appendices|supplementary(?: materials?)?"),
+]
+
+# Order in which sections are given budget; sections not listed are dropped
+SECTION_PRIORITY = [
+    "front", "abstract", "conclusion", "results", "method", "introduction",
+    "discussion", "related_work", "appendix",
+]
+
+# Front matter (title, authors) is capped so a paper without an abstract
+# heading does not spend the budget on affiliations
+FRONT_MAX_TOKENS = 300
+
+# Partial sections smaller than this are not worth including
+MIN_PARTIAL_TOKENS = 100
+
+# Generic words that only start a section under a numbered heading ("3 Models");
+# on a line of their own ("Data", "Setup") they are usually figure or table labels
+NUMBERED_ONLY_HEADINGS: Dict[str, str] = {
+    "method": r"models?|architecture|framework|data(?:sets?)?|setup",
+}
+
+_TITLES = "|".join(
+    f"(?P<{name}>{pattern}|{NUMBERED_ONLY_HEADINGS[name]})" if name in NUMBERED_ONLY_HEADINGS
+    else f"(?P<{name}>{pattern})"
+    for name, pattern in SECTION_HEADINGS
+)
+_PLAIN_TITLES = "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_HEADINGS)
+
+# "3 Results", "IV. EXPERIMENTS", "A. Appendix: Proofs" - only top-level numbers.
+# Letters need their delimiter, or "A Framework for ..." would be a heading.
+NUMBERED_HEADING = re.compile(
+    rf"^(?:\d{{1,2}}[.)]?|[IVX]{{1,5}}\.|[A-H][.)])\s+(?:{_TITLES})\b[^.]{{0,50}}$", re.IGNORECASE
+)
+
+# "Results", "CONCLUSIONS:", "Conclusions and Future Work" on a line of their own,
+# or "Abstract - We ..." / "Appendix B ..."
+PLAIN_HEADING = re.compile(rf"^(?:{_PLAIN_TITLES})(?:\s+(?:and|&)\s+[\w ]{{1,30}})?\s*:?$", re.IGNORECASE)
+INLINE_HEADING = re.compile(r"^(?:(?P<abstract>abstract)\s*[-—–:.]\s*\S|(?P<appendix>appendix)\s+[A-Z]\b)",
+                            re.IGNORECASE)
+
+# Publication stamps that carry no content. Only the stamp forms are matched,
+# and only in front matter and at page edges (see split_sections), so body
+# text mentioning a review, a licence or proceedings is kept.
+BOILERPLATE = re.compile(
+    r"^(?:arXiv:\d{4}\.\d{4,5}(?:v\d+)?\b.*"
+    r"|Preprint\.?(?:\s+(?:Under review|Submitted to|Work in progress)\b.*)?"
+    r"|Under review as a (?:conference|workshop|journal) paper\b.*"
+    r"|(?:Copyright|©)\s*(?:\(c\)\s*)?(?:19|20)\d{2}\b.*"
+    r"|Permission to make digital or hard copies\b.*"
+    r"|(?:In )?Proceedings of the\b.*\b(?:19|20)\d{2}\b.*"
+    r"|(?:This (?:work|article|paper) is )?(?:licensed|distributed) under (?:a |the )?Creative Commons\b.*"
+    r"|\S+@\S+\.\w+(?:[,;\s]+\S+@\S+\.\w+)*)$",
+    re.IGNORECASE
+)
+
+# Sections before the introduction: title, authors and abstract (the first page)
+FRONT_MATTER = {"front", "abstract"}
+
+# Lines at the top and bottom of a page where stamps are looked for
+STAMP_EDGE_LINES = 3
+
+# A page break with the line breaks around it
+PAGE_BREAKS = re.compile(r"[\n\f]*\f[\n\f]*")
+
+
+class Section(BaseModel):
+    """Contiguous part of a paper under one heading."""
+    name: str
+    heading: str = ""
+    text: str
+
+
+class ContextSelection(BaseModel):
+    """Paper text chosen for the prompt and how it was chosen."""
+    text: str
+    input_tokens: int  # Tokens of the whole extracted text
+    selected_tokens: int  # Tokens of the selected text
+    kept: List[str] = Field(default_factory=list)  # Sections included, in priority order
+    truncated: List[str] = Field(default_factory=list)  # Sections included only in part
+    dropped: List[str] = Field(default_factory=list)  # Sections left out
+    token_counter: str = "estimate"  # How tokens were counted
+
+
+def _classify(line: str) -> Optional[str]:
+    """Get the section a heading line starts, or None for body text."""
+    line = line.strip()
+    if not line or len(line) > 80:
+        return None
+    match = NUMBERED_HEADING.match(line) or PLAIN_HEADING.match(line) or INLINE_HEADING.match(line)
+    if not match:
+        return None
+    name = next(name for name, value in match.groupdict().items() if value)
+    # Headings are capitalized; "2 models were trained" is a wrapped sentence
+    return name if line[match.start(name)].isupper() else None
+
+
+def _page_edges(lines: List[str]) -> Set[int]:
+    """Indices of the first and last non-empty lines of every page (pages start at PAGE_BREAK)."""
+    starts = [0] + [index for index, line in enumerate(lines) if PAGE_BREAK in line and index]
+    edges: Set[int] = set()
+    for start, stop in zip(starts, starts[1:] + [len(lines)]):
+        content = [index for index in range(start, stop) if lines[index].strip()]
+        edges.update(content[:STAMP_EDGE_LINES] + content[-STAMP_EDGE_LINES:])
+    return edges
+
+
+def drop_page_breaks(text: str) -> str:
+    """Join pages back into running text, keeping a paragraph break where there was one."""
+    return PAGE_BREAKS.sub(
+        lambda match: "\n" * min(2, max(1, *map(len, match.group().split(PAGE_BREAK)))), text
+    )
+
+
+def split_sections(text: str) -> List[Section]:
+    """
+    Split paper text into sections at recognised headings.
+
+    Text before the first heading is the "front" section (title, authors).
+    Headings that are not recognised do not start a new section.
+    Publication stamps are dropped from the front matter and, in text with
+    page breaks, from the edges of every page.
+
+    Args:
+        text: Extracted paper text
+
+    Returns:
+        Sections in document order
+    """
+    sections: List[Section] = []
+    name, heading, lines = "front", "", []
+    all_lines = text.split("\n")
+    edges = _page_edges(all_lines) if PAGE_BREAK in text else set()
+    for index, line in enumerate(all_lines):
+        found = _classify(line)
+        if found:
+            if lines:
+                sections.append(Section(name=name, heading=heading, text="\n".join(lines)))
+            name, heading, lines = found, line.strip(), []
+        stamp = (name in FRONT_MATTER or index in edges) and BOILERPLATE.match(line.strip(PAGE_BREAK + " \t"))
+        if not stamp:
+            lines.append(line)
+    if lines:
+        sections.append(Section(name=name, heading=heading, text="\n".join(lines)))
+    return sections
+
+
+class TokenCounter:
+    """
+    Counts tokens the way the agents' model does.
+
+    Uses the SDK's local tokenizer when it is available (google-genai with
+    sentencepiece), otherwise the count_tokens API, and falls back to a
+    characters-per-token estimate if neither works.
+
+    The API is asked once per document: the first text counted (the whole
+    paper) sets the model's characters per token, and sections and cut
+    pieces are measured with that ratio instead of a request each. The
+    request waits for the shared LLM rate limiter like the agents' calls.
+    """
+
+    def __init__(self, model: Optional[str] = None, client: Any = None,
+                 limiter: Any = None, limiter_key: Optional[str] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            model: Gemini model name (None only estimates)
+            client: genai client for the count_tokens API (None skips the API)
+            limiter: ratelimit.RateLimiter the count_tokens request waits for (None sends it at once)
+            limiter_key: Bucket of the limiter (see ratelimit.bucket_key)
+        """
+        self.model = model
+        self.client = client
+        self.limiter = limiter
+        self.limiter_key = limiter_key
+        self.method = "estimate"
+        self._tokenizer = None
+        self._chars_per_token: Optional[float] = None
+        self._lock = threading.Lock()
+        if model:
+            self._tokenizer = self._local_tokenizer(model)
+            if self._tokenizer is not None:
+                self.method = "local"
+            elif client is not None:
+                self.method = "api"
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _local_tokenizer(model: str) -> Any:
+        """Load the local tokenizer of a model (or of its stable base model), once per process."""
+        try:
+            from google.genai.local_tokenizer import LocalTokenizer
+        except ImportError:
+            return None
+        for name in dict.fromkeys([model, re.sub(r"-(?:exp|preview)\b.*$", "", model)]):
+            try:
+                return LocalTokenizer(model_name=name)
+            except Exception:
+                continue
+        return None
+
+    def _calibrate(self, text: str) -> int:
+        """Count a text with one count_tokens request and keep its characters per token."""
+        if self.limiter is not None:
+            self.limiter.acquire(self.limiter_key)
+        try:
+            tokens = self.client.models.count_tokens(model=self.model, contents=text).total_tokens
+        except Exception as e:
+            if self.limiter is not None and is_rate_limit_error(e):
+                self.limiter.backoff(self.limiter_key, retry_delay(e))
+            raise
+        self._chars_per_token = len(text) / max(1, tokens)
+        return tokens
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Token count
+        """
+        if not text:
+            return 0
+        try:
+            if self.method == "local":
+                with self._lock:
+                    return self._tokenizer.count_tokens(text).total_tokens
+            if self.method == "api":
+                if self._chars_per_token is None:
+                    return self._calibrate(text)
+                return math.ceil(len(text) / self._chars_per_token)
+        except Exception as e:
+            print(f"Token counting with the {self.method} counter failed, estimating instead: {str(e)}")
+            self.method = "estimate"
+        return estimate_tokens(text)
+
+
+def _cut(text: str, tokens: int, budget: int, counter: TokenCounter) -> Tuple[str, int]:
+    """Cut a section to fit a token budget, at a line boundary."""
+    chars_per_token = len(text) / max(1, tokens)
+    for _ in range(4):
+        limit = int(budget * chars_per_token)
+        end = text.rfind("\n", 0, limit)
+        piece = text[:end if end > 0 else limit]
+        piece_tokens = counter.count(piece)
+        if piece_tokens <= budget:
+            return piece, piece_tokens
+        chars_per_token *= 0.9 * budget / piece_tokens
+    return "", 0
+
+
+def select_context(text: str, max_tokens: int, counter: Optional[TokenCounter] = None) -> ContextSelection:
+    """
+    Select the parts of a paper that fit a token budget.
+
+    Sections are given budget in SECTION_PRIORITY order (abstract and
+    conclusion before results, method and introduction); the reference
+    list and acknowledgments are dropped. The selected sections are put
+    back together in document order, without page breaks. Text without
+    recognised headings is cut at the budget, as before.
+
+    Args:
+        text: Extracted paper text
+        max_tokens: Token budget of the selection
+        counter: Token counter (None estimates from the character count)
+
+    Returns:
+        ContextSelection with the selected text and what was kept or dropped
+    """
+    counter = counter or TokenCounter()
+    sections = split_sections(text)
+    # Counted first, so an API counter calibrates on the whole paper
+    input_tokens = counter.count(text)
+    if all(section.name == "front" for section in sections):
+        if input_tokens <= max_tokens:
+            return ContextSelection(text=drop_page_breaks(text), input_tokens=input_tokens, selected_tokens=input_tokens,
+                                    kept=["front"], token_counter=counter.method)
+        piece, tokens = _cut(text, input_tokens, max_tokens, counter)
+        if not piece:
+            piece = text[:max_tokens * CHARS_PER_TOKEN]
+            tokens = estimate_tokens(piece)
+        return ContextSelection(text=drop_page_breaks(piece), input_tokens=input_tokens, selected_tokens=tokens,
+                                truncated=["front"], token_counter=counter.method)
+
+    counts = [counter.count(section.text) for section in sections]
+    chosen: Dict[int, str] = {}
+    kept: List[str] = []
+    truncated: List[str] = []
+    remaining = max_tokens
+    for name in SECTION_PRIORITY:
+        for index, section in enumerate(sections):
+            if section.name != name or remaining <= 0:
+                continue
+            limit = min(remaining, FRONT_MAX_TOKENS) if name == "front" else remaining
+            if counts[index] <= limit:
+                chosen[index] = section.text
+                remaining -= counts[index]
+                kept.append(name)
+            elif limit >= MIN_PARTIAL_TOKENS:
+                piece, tokens = _cut(section.text, counts[index], limit, counter)
+                if piece:
+                    chosen[index] = piece
+                    remaining -= tokens
+                    truncated.append(name)
+
+    dropped = [section.name for index, section in enumerate(sections) if index not in chosen]
+    return ContextSelection(
+        text=drop_page_breaks("\n".join(chosen[index] for index in sorted(chosen))),
+        input_tokens=input_tokens,
+        selected_tokens=max_tokens - remaining,
+        kept=list(dict.fromkeys(kept)),
+        truncated=list(dict.fromkeys(truncated)),
+        dropped=list(dict.fromkeys(dropped)),
+        token_counter=counter.method
+    )
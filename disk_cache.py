@@ -0,0 +1,170 @@
+"""
+Content-addressed on-disk cache with LRU eviction.
+Shared by the audio and PDF stages to avoid repeating expensive work.
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Optional, Any
+
+# Eviction trims the cache to this share of its cap, so the puts after it
+# do not each walk the whole cache directory again
+EVICT_TO_SHARE = 0.9
+
+
+def hash_key(*parts: Any) -> str:
+    """
+    Build a stable SHA-256 cache key from the given parts.
+
+    Args:
+        parts: Values identifying the cached content (str or bytes)
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode('utf-8')
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Byte-blob cache stored as one file per key.
+
+    Recency is tracked through file modification times, so the cache can be
+    shared by several processes on the same host. Writes are atomic
+    (temp file + rename) and the total size is kept under ``max_bytes`` by
+    evicting the least recently used entries down to EVICT_TO_SHARE of it.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024, suffix: str = ".bin"):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Size cap for all entries together
+            suffix: File extension used for entries
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> str:
+        """Get the file path for a cache key."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}{self.suffix}")
+
+    def _entries(self):
+        """Yield (path, mtime, size) for every cache entry."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Evicted by another process
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a cache entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached bytes, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # Mark as recently used
+            os.utime(path, None)
+        except OSError:
+            # Evicted since the read; the data is still a hit, only the LRU touch is lost
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store a cache entry, evicting old entries if the size cap is exceeded.
+
+        Args:
+            key: Cache key
+            data: Bytes to store
+        """
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # An overwritten entry no longer counts towards the size
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache is down to EVICT_TO_SHARE of its cap."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * EVICT_TO_SHARE
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hits, misses, hit_rate and current size in bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size_bytes": self._size,
+            }
@@ -0,0 +1,297 @@
+"""
+Offline stand-ins for the Google TTS and Gemini backends.
+They return deterministic audio and canned agent output, with configurable
+latency and error rates, so the whole pipeline can be load- and
+regression-tested without network access or API quota.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Tuple
+
+import numpy as np
+from google.genai import errors, types
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from disk_cache import hash_key
+
+# Output format of the fake TTS (same as Google TTS: 16-bit mono PCM)
+FAKE_SAMPLE_RATE = 24000
+
+# Speaking rate of the fake TTS, in seconds of audio per character
+SECONDS_PER_CHAR = 0.065
+
+# Pause between speakers in multi-speaker requests, in milliseconds
+TURN_PAUSE_MS = 400
+
+# Leading and trailing silence of every response, in milliseconds
+EDGE_SILENCE_MS = 150
+
+MULTI_SPEAKER_PREFIX = "TTS the following conversation between"
+
+FILLER_WORDS = (
+    "model results data training evaluation benchmark agents researchers paper method "
+    "approach baseline accuracy quality latency system users analysis experiment findings"
+).split()
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _seed(*parts: Any) -> int:
+    """Derive a stable RNG seed from the given parts."""
+    return int(hash_key(*parts)[:8], 16)
+
+
+def _silence(ms: float, rng: np.random.Generator) -> np.ndarray:
+    """Near-silent room tone."""
+    return rng.normal(0, 20, int(FAKE_SAMPLE_RATE * ms / 1000))
+
+
+def _speech(text: str, voice_name: str) -> np.ndarray:
+    """Speech-like tone for a line: pitch set by the voice, syllable-rate envelope, length by text."""
+    rng = np.random.default_rng(_seed(voice_name, text))
+    frames = max(1, int(len(text) * SECONDS_PER_CHAR * FAKE_SAMPLE_RATE))
+    t = np.arange(frames) / FAKE_SAMPLE_RATE
+    pitch = 100 + _seed(voice_name) % 150
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0.15, 1.0)
+    tone = np.sin(2 * np.pi * pitch * t) + 0.4 * np.sin(2 * np.pi * 2 * pitch * t)
+    return (0.7 * tone + 0.3 * rng.standard_normal(frames)) * envelope * 6000
+
+
+def _parse_prompt(prompt: str) -> List[Tuple[str, str]]:
+    """Split a TTS prompt into (speaker, text) lines."""
+    lines = prompt.split("\n")[1:] if prompt.startswith(MULTI_SPEAKER_PREFIX) else [prompt]
+    parsed = []
+    for line in lines:
+        speaker, _, text = line.partition(": ")
+        parsed.append((speaker, text) if text else ("", line))
+    return parsed
+
+
+def _voices(config: Any) -> Dict[str, str]:
+    """Map speakers to voice names from a single- or multi-speaker speech config."""
+    speech_config = getattr(config, "speech_config", None)
+    if speech_config is None:
+        return {}
+    multi = getattr(speech_config, "multi_speaker_voice_config", None)
+    if multi is not None:
+        return {
+            item.speaker: item.voice_config.prebuilt_voice_config.voice_name
+            for item in multi.speaker_voice_configs
+        }
+    voice = speech_config.voice_config.prebuilt_voice_config.voice_name
+    return {"": voice}
+
+
+class _FakeModels:
+    """The ``models`` namespace of FakeTTSClient."""
+
+    def __init__(self, client: "FakeTTSClient"):
+        self._client = client
+
+    def generate_content(self, model: str, contents: str, config: Any = None) -> types.GenerateContentResponse:
+        return self._client.generate_content(model, contents, config)
+
+
+class FakeTTSClient:
+    """
+    Drop-in for ``genai.Client`` covering ``models.generate_content`` TTS requests.
+
+    Every line is rendered as a deterministic tone whose pitch depends on
+    the voice and whose length depends on the text; multi-speaker requests
+    get a pause between turns, as the real service does. Requests can be
+    delayed and can fail with 5xx or 429 errors at configurable rates.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_per_char: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the fake client.
+
+        Args:
+            latency: Fixed delay per request, in seconds
+            latency_per_char: Additional delay per prompt character, in seconds
+            error_rate: Probability that a request fails with HTTP 503
+            rate_limit_rate: Probability that a request fails with HTTP 429
+            seed: Seed of the error draws
+        """
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.models = _FakeModels(self)
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeTTSClient":
+        """Create a fake client configured by FAKE_TTS_* environment variables."""
+        return cls(
+            latency=_env_float("FAKE_TTS_LATENCY", 0.0),
+            latency_per_char=_env_float("FAKE_TTS_LATENCY_PER_CHAR", 0.0),
+            error_rate=_env_float("FAKE_TTS_ERROR_RATE", 0.0),
+            rate_limit_rate=_env_float("FAKE_TTS_429_RATE", 0.0),
+            seed=int(_env_float("FAKE_SEED", 0))
+        )
+
+    def generate_content(self, model: str, contents: str, config: Any = None) -> types.GenerateContentResponse:
+        """
+        Synthesize a TTS prompt.
+
+        Raises:
+            errors.ServerError: With probability ``error_rate``
+            errors.ClientError: HTTP 429 with probability ``rate_limit_rate``
+        """
+        with self._lock:
+            self.requests += 1
+            draw = self._rng.random()
+        time.sleep(self.latency + self.latency_per_char * len(contents))
+        if draw < self.rate_limit_rate:
+            with self._lock:
+                self.failures += 1
+            raise errors.ClientError(429, {"error": {
+                "code": 429,
+                "message": "Fake quota exceeded. retryDelay: '1s'",
+                "status": "RESOURCE_EXHAUSTED"
+            }})
+        if draw < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.failures += 1
+            raise errors.ServerError(503, {"error": {
+                "code": 503,
+                "message": "Fake backend overloaded",
+                "status": "UNAVAILABLE"
+            }})
+
+        voices = _voices(config)
+        lines = _parse_prompt(contents)
+        rng = np.random.default_rng(_seed(contents))
+        parts = [_silence(EDGE_SILENCE_MS, rng)]
+        for i, (speaker, text) in enumerate(lines):
+            if i:
+                parts.append(_silence(TURN_PAUSE_MS, rng))
+            parts.append(_speech(text, voices.get(speaker, voices.get("", speaker))))
+        parts.append(_silence(EDGE_SILENCE_MS, rng))
+        pcm = np.clip(np.concatenate(parts), -32768, 32767).astype("<i2").tobytes()
+
+        blob = types.Blob(data=pcm, mime_type=f"audio/L16;codec=pcm;rate={FAKE_SAMPLE_RATE}")
+        return types.GenerateContentResponse(candidates=[
+            types.Candidate(content=types.Content(role="model", parts=[types.Part(inline_data=blob)]))
+        ])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get request counters.
+
+        Returns:
+            Dictionary with the number of requests and injected failures
+        """
+        with self._lock:
+            return {"requests": self.requests, "failures": self.failures}
+
+
+def canned_dialogue(lines: int = 12) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Build a deterministic podcast script.
+
+    Args:
+        lines: Number of dialogue lines
+
+    Returns:
+        Script with a 'dialogue' list alternating between Sarah and Dennis
+    """
+    rng = random.Random(lines)
+    dialogue = []
+    for index in range(lines):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(8, 40))]
+        dialogue.append({
+            "speaker": "Sarah" if index % 2 == 0 else "Dennis",
+            "text": f"Line {index}: " + " ".join(words).capitalize() + "."
+        })
+    return {"dialogue": dialogue}
+
+
+def canned_summary() -> Dict[str, Any]:
+    """Build a deterministic paper summary in the ResearchAnalyst format."""
+    return {
+        "title": "A Deterministic Stand-in Paper",
+        "main_findings": ["Fake backends make the pipeline reproducible", "No quota is used"],
+        "methodology": "Canned responses from an offline model",
+        "key_implications": ["Throughput can be measured on a laptop"],
+        "limitations": ["The content is not about the uploaded paper"],
+        "future_work": ["Replace with the real model for quality checks"],
+        "summary_date": "2025-01-01T00:00:00"
+    }
+
+
+class FakeLlm(BaseLlm):
+    """
+    ADK model stand-in returning canned output for each agent of the pipeline.
+
+    The agent is recognised from its request: the audio agent (which has the
+    generate_audio_segments tool) gets a call with a canned script and a
+    short report once the tool has answered, script agents get the script
+    JSON, the analyst gets a paper summary and anything else gets plain text.
+    """
+
+    model: str = "fake-llm"
+    latency: float = 0.0
+    script_lines: int = 12
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake-.*"]
+
+    @classmethod
+    def from_env(cls) -> "FakeLlm":
+        """Create a fake model configured by FAKE_LLM_* environment variables."""
+        return cls(
+            latency=_env_float("FAKE_LLM_LATENCY", 0.0),
+            script_lines=int(_env_float("FAKE_LLM_SCRIPT_LINES", 12))
+        )
+
+    def _reply(self, llm_request: LlmRequest) -> types.Content:
+        """Pick the canned reply for the agent that sent the request."""
+        instruction = str(getattr(llm_request.config, "system_instruction", "") or "")
+        script = json.dumps(canned_dialogue(self.script_lines))
+        if "generate_audio_segments" in llm_request.tools_dict:
+            last = llm_request.contents[-1] if llm_request.contents else None
+            responses = [part.function_response for part in (last.parts or [])] if last else []
+            responses = [response for response in responses if response]
+            if responses:
+                result = responses[0].response or {}
+                text = f"Audio generation finished: {result.get('final_podcast') or result.get('error')}"
+                return types.Content(role="model", parts=[types.Part(text=text)])
+            call = types.FunctionCall(name="generate_audio_segments", args={"enhanced_script": script})
+            return types.Content(role="model", parts=[types.Part(function_call=call)])
+        # Earlier outputs are templated into later instructions, so match
+        # the wording of each agent's own request rather than any JSON key
+        if '"dialogue"' in instruction:
+            text = script
+        elif "main_findings:" in instruction:
+            text = json.dumps(canned_summary())
+        else:
+            text = "Supporting research: recent work applies these ideas in practice."
+        return types.Content(role="model", parts=[types.Part(text=text)])
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        yield LlmResponse(content=self._reply(llm_request))
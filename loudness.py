@@ -0,0 +1,410 @@
+"""
+Loudness measurement and dynamics processing for podcast audio.
+Vectorized with numpy, following the ITU-R BS.1770 gating scheme.
+"""
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# BS.1770 gating: 400 ms blocks with 75% overlap, built from 100 ms sub-blocks
+SUB_BLOCK_MS = 100
+BLOCKS_PER_GATE = 4
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+# Frames processed per chunk when scanning or rewriting a buffer
+CHUNK_FRAMES = 1 << 20
+
+# Sample-peak limiter: gain computed per window, smoothed over the release time
+LIMITER_WINDOW_MS = 5
+LIMITER_RELEASE_MS = 55
+
+# Make-up gain rounds; each one recovers loudness the limiter took away
+LIMITER_PASSES = 4
+
+# Misses of the loudness target up to this are counted as reaching it
+TARGET_TOLERANCE_LU = 0.5
+
+# Per-frame linear gains for the sample range [start, stop)
+GainFunction = Callable[[int, int], np.ndarray]
+
+
+def _biquad_power(b: np.ndarray, a: np.ndarray, freqs: np.ndarray, frame_rate: int) -> np.ndarray:
+    """Squared magnitude response of a biquad filter at the given frequencies."""
+    z = np.exp(-1j * 2 * np.pi * freqs / frame_rate)
+    numerator = b[0] + b[1] * z + b[2] * z ** 2
+    denominator = a[0] + a[1] * z + a[2] * z ** 2
+    return np.abs(numerator / denominator) ** 2
+
+
+def k_weighting(freqs: np.ndarray, frame_rate: int) -> np.ndarray:
+    """
+    Power response of the BS.1770 K-weighting filter (high shelf + high pass).
+
+    Args:
+        freqs: Frequencies in Hz
+        frame_rate: Sample rate the filter is designed for
+
+    Returns:
+        Power gain at each frequency
+    """
+    # Stage 1: +4 dB high shelf around 1.5 kHz
+    gain_db, q, fc = 4.0, 1 / math.sqrt(2), 1500.0
+    big_a = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * fc / frame_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    shelf_b = np.array([
+        big_a * ((big_a + 1) + (big_a - 1) * cos_w0 + 2 * math.sqrt(big_a) * alpha),
+        -2 * big_a * ((big_a - 1) + (big_a + 1) * cos_w0),
+        big_a * ((big_a + 1) + (big_a - 1) * cos_w0 - 2 * math.sqrt(big_a) * alpha),
+    ])
+    shelf_a = np.array([
+        (big_a + 1) - (big_a - 1) * cos_w0 + 2 * math.sqrt(big_a) * alpha,
+        2 * ((big_a - 1) - (big_a + 1) * cos_w0),
+        (big_a + 1) - (big_a - 1) * cos_w0 - 2 * math.sqrt(big_a) * alpha,
+    ])
+
+    # Stage 2: high pass at 38 Hz
+    q, fc = 0.5, 38.0
+    w0 = 2 * math.pi * fc / frame_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    pass_b = np.array([(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2])
+    pass_a = np.array([1 + alpha, -2 * cos_w0, 1 - alpha])
+
+    return _biquad_power(shelf_b, shelf_a, freqs, frame_rate) * _biquad_power(pass_b, pass_a, freqs, frame_rate)
+
+
+def block_energies(
+    samples: np.ndarray,
+    frame_rate: int,
+    gain: Optional[GainFunction] = None
+) -> np.ndarray:
+    """
+    K-weighted mean square of every 400 ms gating block.
+
+    Each 100 ms sub-block is K-weighted in the frequency domain and its power
+    taken through Parseval's theorem; overlapping 400 ms blocks are then
+    averages of four consecutive sub-blocks. The buffer is scanned in chunks,
+    so memory use does not grow with its length.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate
+        gain: Optional per-frame linear gains applied before measuring
+
+    Returns:
+        Mean square per gating block, summed over channels
+    """
+    size = int(frame_rate * SUB_BLOCK_MS / 1000)
+    count = len(samples) // size
+    if count < BLOCKS_PER_GATE:
+        return np.zeros(0)
+
+    freqs = np.fft.rfftfreq(size, d=1.0 / frame_rate)
+    weights = k_weighting(freqs, frame_rate)
+    # Parseval weights for a one-sided spectrum
+    weights[1:] *= 2
+    if size % 2 == 0:
+        weights[-1] /= 2
+
+    batch = max(1, CHUNK_FRAMES // size)
+    energies = np.empty(count)
+    for first in range(0, count, batch):
+        last = min(count, first + batch)
+        chunk = samples[first * size:last * size].astype(np.float64) / 32768.0
+        if gain is not None:
+            chunk *= gain(first * size, last * size)[:, np.newaxis]
+        blocks = chunk.reshape(last - first, size, samples.shape[1])
+        spectrum = np.abs(np.fft.rfft(blocks, axis=1)) ** 2
+        power = np.einsum('bkc,k->bc', spectrum, weights) / size ** 2
+        energies[first:last] = power.sum(axis=1)
+
+    return np.convolve(energies, np.ones(BLOCKS_PER_GATE) / BLOCKS_PER_GATE, mode='valid')
+
+
+def gated_loudness(energies: np.ndarray) -> float:
+    """
+    Integrated loudness of gating blocks with absolute and relative gates.
+
+    Args:
+        energies: Mean square per gating block (from block_energies)
+
+    Returns:
+        Integrated loudness in LUFS, or -inf for silence
+    """
+    energies = energies[energies > 0]
+    if not len(energies):
+        return float('-inf')
+    loudness = -0.691 + 10 * np.log10(energies)
+    energies = energies[loudness > ABSOLUTE_GATE_LUFS]
+    if not len(energies):
+        return float('-inf')
+    relative_gate = -0.691 + 10 * math.log10(energies.mean()) + RELATIVE_GATE_LU
+    energies = energies[-0.691 + 10 * np.log10(energies) > relative_gate]
+    return -0.691 + 10 * math.log10(energies.mean())
+
+
+def integrated_loudness(samples: np.ndarray, frame_rate: int, gain: Optional[GainFunction] = None) -> float:
+    """
+    Measure integrated loudness (LUFS-style, BS.1770 gating).
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate
+        gain: Optional per-frame linear gains applied before measuring
+
+    Returns:
+        Integrated loudness in LUFS, or -inf for silence
+    """
+    return gated_loudness(block_energies(samples, frame_rate, gain))
+
+
+def compressor_gain(
+    samples: np.ndarray,
+    frame_rate: int,
+    threshold_db: float,
+    ratio: float,
+    input_gain_db: float = 0.0,
+    window_ms: int = 10,
+    smoothing_ms: int = 50
+) -> GainFunction:
+    """
+    Build the gain curve of a simple feed-forward RMS compressor.
+
+    Levels are measured over short windows; anything above the threshold is
+    reduced by ``1 - 1/ratio`` of the excess and the gain reduction is smoothed
+    with a moving average to avoid zipper noise.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate
+        threshold_db: Threshold in dBFS (RMS)
+        ratio: Compression ratio (1 disables compression)
+        input_gain_db: Gain applied to the signal before it reaches the compressor
+        window_ms: Level detection window
+        smoothing_ms: Gain smoothing window
+
+    Returns:
+        Function returning the per-frame linear gain (including input gain) for a sample range
+    """
+    window = max(1, int(frame_rate * window_ms / 1000))
+    windows = -(-len(samples) // window)
+    levels = np.empty(windows)
+    batch = max(1, CHUNK_FRAMES // window)
+    for first in range(0, windows, batch):
+        last = min(windows, first + batch)
+        chunk = samples[first * window:last * window].astype(np.float64) / 32768.0
+        padded = np.zeros(((last - first) * window, samples.shape[1]))
+        padded[:len(chunk)] = chunk
+        mean_square = (padded.reshape(last - first, window, -1) ** 2).mean(axis=(1, 2))
+        levels[first:last] = 10 * np.log10(mean_square + 1e-12) + input_gain_db
+
+    reduction = np.zeros(windows)
+    if ratio > 1:
+        excess = np.maximum(levels - threshold_db, 0)
+        reduction = excess * (1 - 1 / ratio)
+        taps = max(1, smoothing_ms // window_ms)
+        reduction = np.convolve(reduction, np.ones(taps) / taps, mode='same')
+    window_gains = 10 ** ((input_gain_db - reduction) / 20)
+    centers = np.arange(windows) * window + window / 2
+
+    def gain(start: int, stop: int) -> np.ndarray:
+        return np.interp(np.arange(start, stop), centers, window_gains)
+
+    return gain
+
+
+def apply_gain(samples: np.ndarray, gain: GainFunction, scale: float = 1.0) -> None:
+    """
+    Apply per-frame gains to int16 samples in place, chunk by chunk.
+
+    Args:
+        samples: (frames, channels) int16 samples (modified in place)
+        gain: Per-frame linear gains
+        scale: Extra linear gain applied on top
+    """
+    for start in range(0, len(samples), CHUNK_FRAMES):
+        stop = min(len(samples), start + CHUNK_FRAMES)
+        chunk = samples[start:stop].astype(np.float64)
+        chunk *= (gain(start, stop) * scale)[:, np.newaxis]
+        samples[start:stop] = np.clip(np.round(chunk), -32768, 32767).astype(np.int16)
+
+
+def peak_level(samples: np.ndarray, gain: Optional[GainFunction] = None) -> float:
+    """
+    Sample peak as a linear fraction of full scale.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        gain: Optional per-frame linear gains applied before measuring
+
+    Returns:
+        Peak amplitude (1.0 = full scale)
+    """
+    peak = 0.0
+    for start in range(0, len(samples), CHUNK_FRAMES):
+        stop = min(len(samples), start + CHUNK_FRAMES)
+        chunk = np.abs(samples[start:stop].astype(np.float64)).max(axis=1) / 32768.0
+        if gain is not None:
+            chunk *= gain(start, stop)
+        if len(chunk):
+            peak = max(peak, float(chunk.max()))
+    return peak
+
+
+def _scaled(gain: GainFunction, scale: float) -> GainFunction:
+    """Gain curve multiplied by a constant."""
+    return lambda start, stop: gain(start, stop) * scale
+
+
+def limiter_gain(
+    samples: np.ndarray,
+    frame_rate: int,
+    gain: GainFunction,
+    ceiling: float,
+    window_ms: int = LIMITER_WINDOW_MS,
+    release_ms: int = LIMITER_RELEASE_MS
+) -> GainFunction:
+    """
+    Build the gain curve of ``gain`` followed by a sample-peak limiter.
+
+    The peak of every short window is measured after ``gain``; windows that
+    would exceed ``ceiling`` get just enough gain reduction to meet it.
+    Each reduction is held over the release span before being smoothed
+    with a moving average, so the smoothing never lets a peak through and
+    the rest of the signal keeps its level.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate
+        gain: Per-frame linear gains applied before the limiter
+        ceiling: Largest sample peak as a linear fraction of full scale
+        window_ms: Peak detection window
+        release_ms: Gain smoothing span
+
+    Returns:
+        Function returning the per-frame linear gain (``gain`` and limiter) for a sample range
+    """
+    window = max(1, int(frame_rate * window_ms / 1000))
+    windows = -(-len(samples) // window)
+    peaks = np.zeros(windows)
+    batch = max(1, CHUNK_FRAMES // window)
+    for first in range(0, windows, batch):
+        last = min(windows, first + batch)
+        start, stop = first * window, min(len(samples), last * window)
+        chunk = np.abs(samples[start:stop].astype(np.float64)).max(axis=1) / 32768.0 * gain(start, stop)
+        padded = np.zeros((last - first) * window)
+        padded[:len(chunk)] = chunk
+        peaks[first:last] = padded.reshape(last - first, window).max(axis=1)
+
+    required = np.minimum(1.0, ceiling / np.maximum(peaks, 1e-12))
+    # Odd tap count, so the average is centred on each window
+    taps = 2 * (max(1, release_ms // window_ms) // 2) + 1
+    # Hold one window past the average's reach: frames between two window
+    # centres are interpolated from both
+    held = required.copy()
+    for shift in range(1, min(windows, taps // 2 + 2)):
+        held[shift:] = np.minimum(held[shift:], required[:-shift])
+        held[:-shift] = np.minimum(held[:-shift], required[shift:])
+    limit = np.convolve(np.pad(held, taps // 2, mode='edge'), np.ones(taps) / taps, mode='valid')
+    centers = np.arange(windows) * window + window / 2
+
+    def limited(start: int, stop: int) -> np.ndarray:
+        return gain(start, stop) * np.interp(np.arange(start, stop), centers, limit)
+
+    return limited
+
+
+def normalize_group(
+    buffers: List[np.ndarray],
+    frame_rate: int,
+    target_loudness: float = -14.0,
+    compression_ratio: float = 2.0,
+    compression_threshold: float = -20.0,
+    peak_ceiling: float = -1.0
+) -> Dict[str, float]:
+    """
+    Compress and normalize buffers that share one loudness target, in place.
+
+    Loudness is measured over all buffers together (e.g. every segment of
+    one speaker), so they all receive the same make-up gain. The signal is
+    first brought to the target level, compressed above
+    ``compression_threshold``, then given make-up gain to land on the target
+    again. A sample-peak limiter keeps peaks under ``peak_ceiling``; the
+    loudness it takes away is made up again, for up to LIMITER_PASSES
+    rounds. If the target still cannot be met under the ceiling, the
+    returned ``target_miss_lu`` says by how much it was missed.
+
+    Args:
+        buffers: (frames, channels) int16 sample buffers (modified in place)
+        frame_rate: Sample rate
+        target_loudness: Target integrated loudness in LUFS
+        compression_ratio: Compressor ratio (1 disables compression)
+        compression_threshold: Compressor threshold in dBFS (RMS), after gain to target
+        peak_ceiling: Maximum sample peak in dBFS
+
+    Returns:
+        Dictionary with input loudness, output loudness, applied make-up gain
+        and the shortfall from the target (0 if it was reached)
+    """
+    measured = gated_loudness(np.concatenate([block_energies(buffer, frame_rate) for buffer in buffers]))
+    if measured == float('-inf'):
+        # Silence or too short to measure
+        return {"input_lufs": measured, "output_lufs": measured, "gain_db": 0.0, "target_miss_lu": 0.0}
+
+    gains = [
+        compressor_gain(
+            buffer,
+            frame_rate,
+            threshold_db=compression_threshold,
+            ratio=compression_ratio,
+            input_gain_db=target_loudness - measured
+        )
+        for buffer in buffers
+    ]
+    compressed = gated_loudness(np.concatenate([
+        block_energies(buffer, frame_rate, gain) for buffer, gain in zip(buffers, gains)
+    ]))
+    makeup_db = target_loudness - compressed if compressed != float('-inf') else 0.0
+    ceiling = 10 ** (peak_ceiling / 20)
+
+    for limiter_pass in range(LIMITER_PASSES):
+        if limiter_pass:
+            # Make up the loudness the previous pass's limiter took away
+            makeup_db += target_loudness - output
+        limited = [
+            limiter_gain(buffer, frame_rate, _scaled(gain, 10 ** (makeup_db / 20)), ceiling)
+            for buffer, gain in zip(buffers, gains)
+        ]
+        output = gated_loudness(np.concatenate([
+            block_energies(buffer, frame_rate, gain) for buffer, gain in zip(buffers, limited)
+        ]))
+        if output == float('-inf') or target_loudness - output <= TARGET_TOLERANCE_LU:
+            break
+
+    for buffer, gain in zip(buffers, limited):
+        apply_gain(buffer, gain)
+    return {
+        "input_lufs": measured,
+        "output_lufs": output,
+        "gain_db": makeup_db,
+        "target_miss_lu": max(0.0, target_loudness - output) if output != float('-inf') else 0.0,
+    }
+
+
+def normalize_loudness(samples: np.ndarray, frame_rate: int, **kwargs) -> Dict[str, float]:
+    """
+    Compress and normalize one buffer to a target integrated loudness, in place.
+
+    Args:
+        samples: (frames, channels) int16 samples (modified in place)
+        frame_rate: Sample rate
+        kwargs: Loudness settings accepted by normalize_group
+
+    Returns:
+        Dictionary with input loudness, output loudness and applied make-up gain
+    """
+    return normalize_group([samples], frame_rate, **kwargs)
@@ -0,0 +1,310 @@
+"""
+Parallel MP3 encoding of PCM sample buffers.
+The audio is split at MP3 frame boundaries, the chunks are encoded by
+separate ffmpeg/LAME processes, and the frames are joined behind a single
+Xing + LAME tag so players get the correct duration and gapless trimming.
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# LAME's fixed encoder delay, in samples (decoders add another 528 + 1)
+LAME_ENCODER_DELAY = 576
+
+# Frames encoded before and after each chunk and then dropped, so the kept
+# frames see the same MDCT overlap and psychoacoustic lookahead as in a
+# single-pass encode
+PREROLL_FRAMES = 4
+POSTROLL_FRAMES = 2
+
+# Shortest chunk worth its own encoder process
+MIN_CHUNK_SECONDS = 30
+
+# Layer III bitrates in kbps by bitrate index, for MPEG-1 and MPEG-2/2.5
+BITRATES = {
+    True: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    False: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates by header version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+XING_TOC_SIZE = 100
+
+
+def _crc16_table() -> np.ndarray:
+    """Lookup table for CRC-16 with the reflected polynomial 0xA001."""
+    table = np.arange(256, dtype=np.uint16)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ 0xA001, table >> 1).astype(np.uint16)
+    return table
+
+
+CRC16_TABLE = _crc16_table()
+
+
+def crc16(data: bytes) -> int:
+    """
+    CRC-16 as stored in the LAME tag (reflected polynomial 0xA001, initial value 0).
+
+    The data is cut into equal blocks whose CRCs are computed side by side
+    with numpy and then combined, which is valid because this CRC is linear
+    and unaffected by leading zero bytes.
+
+    Args:
+        data: Bytes to checksum
+
+    Returns:
+        16-bit CRC
+    """
+    if not data:
+        return 0
+    block = max(1, int(len(data) ** 0.5))
+    blocks = -(-len(data) // block)
+    # Leading zero bytes do not change the CRC, so pad at the front
+    buffer = np.zeros(blocks * block, dtype=np.uint8)
+    buffer[-len(data):] = np.frombuffer(data, dtype=np.uint8)
+    buffer = buffer.reshape(blocks, block)
+
+    crcs = np.zeros(blocks, dtype=np.uint16)
+    for i in range(block):
+        crcs = (crcs >> 8) ^ CRC16_TABLE[(crcs ^ buffer[:, i]) & 0xFF]
+
+    # Effect of running one block of zero bytes through each low/high register byte
+    low = np.arange(256, dtype=np.uint16)
+    high = low << 8
+    for _ in range(block):
+        low = (low >> 8) ^ CRC16_TABLE[low & 0xFF]
+        high = (high >> 8) ^ CRC16_TABLE[high & 0xFF]
+
+    crc = 0
+    for value in crcs.tolist():
+        crc = int(low[crc & 0xFF] ^ high[crc >> 8]) ^ value
+    return crc
+
+
+def frame_samples(frame_rate: int) -> int:
+    """Samples per MP3 frame at the given rate (MPEG-1 above 32 kHz, MPEG-2/2.5 below)."""
+    return 1152 if frame_rate >= 32000 else 576
+
+
+def split_frames(data: bytes) -> List[bytes]:
+    """
+    Split a bare layer III stream (no ID3 or Xing tags) into frames.
+
+    Args:
+        data: MP3 stream
+
+    Returns:
+        List of frames, header included
+    """
+    frames = []
+    pos = 0
+    while pos < len(data):
+        if pos + 4 > len(data):
+            raise ValueError(f"Truncated MP3 frame header at byte {pos}")
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version = (header >> 19) & 3
+        layer = (header >> 17) & 3
+        bitrate_index = (header >> 12) & 15
+        rate_index = (header >> 10) & 3
+        if header >> 21 != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            raise ValueError(f"Invalid MP3 frame header at byte {pos}")
+        mpeg1 = version == 3
+        bitrate = BITRATES[mpeg1][bitrate_index] * 1000
+        length = (144 if mpeg1 else 72) * bitrate // SAMPLE_RATES[version][rate_index] + ((header >> 9) & 1)
+        frames.append(data[pos:pos + length])
+        pos += length
+    return frames
+
+
+def info_frame(frames: List[bytes], total_samples: int, frame_rate: int) -> bytes:
+    """
+    Build the Xing/Info frame with a LAME tag for a sequence of audio frames.
+
+    The layout follows what ffmpeg's mp3 muxer writes, so decoders that trim
+    LAME gapless delay and padding play back exactly ``total_samples``.
+
+    Args:
+        frames: Audio frames that follow the tag
+        total_samples: Samples per channel of the encoded audio
+        frame_rate: Sample rate of the encoded audio
+
+    Returns:
+        Tag frame bytes
+    """
+    first = int.from_bytes(frames[0][:4], 'big')
+    version = (first >> 19) & 3
+    rate_index = (first >> 10) & 3
+    channel_mode = (first >> 6) & 3
+    mpeg1 = version == 3
+    mono = channel_mode == 3
+    xing_offset = 4 + ((17 if mono else 32) if mpeg1 else (9 if mono else 17))
+
+    # Smallest frame that holds the Xing section (120 bytes) and the LAME tag (36 bytes)
+    rate = SAMPLE_RATES[version][rate_index]
+    for bitrate_index in range(1, 15):
+        length = (144 if mpeg1 else 72) * BITRATES[mpeg1][bitrate_index] * 1000 // rate
+        if length >= xing_offset + 156:
+            break
+    header = 0xFFE00000 | version << 19 | 1 << 17 | 1 << 16 | bitrate_index << 12 | rate_index << 10 | channel_mode << 6
+
+    sizes = np.array([len(frame) for frame in frames], dtype=np.int64)
+    total_bytes = length + int(sizes.sum())
+    offsets = length + np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    toc = bytes(
+        min(255, 256 * int(offsets[i * len(frames) // XING_TOC_SIZE]) // total_bytes)
+        for i in range(XING_TOC_SIZE)
+    )
+    vbr = len({frame[2] >> 4 for frame in frames}) > 1
+    padding = min(4095, max(0, len(frames) * frame_samples(frame_rate) - LAME_ENCODER_DELAY - total_samples))
+    audio_crc = crc16(b"".join(frames))
+
+    tag = bytearray(length)
+    tag[:4] = header.to_bytes(4, 'big')
+    pos = xing_offset
+    tag[pos:pos + 16] = (
+        (b"Xing" if vbr else b"Info")
+        + (0x0F).to_bytes(4, 'big')  # frames, bytes, TOC and quality present
+        + len(frames).to_bytes(4, 'big')
+        + total_bytes.to_bytes(4, 'big')
+    )
+    pos += 16
+    tag[pos:pos + XING_TOC_SIZE] = toc
+    pos += XING_TOC_SIZE + 4  # quality left at 0
+    lame_tag = (
+        b"Lavf lame"
+        + bytes(2)  # tag revision / VBR method, lowpass
+        + bytes(8)  # ReplayGain
+        + bytes(2)  # encoding flags, minimal bitrate
+        + (LAME_ENCODER_DELAY << 12 | padding).to_bytes(3, 'big')
+        + bytes(4)  # misc, MP3 gain, preset
+        + total_bytes.to_bytes(4, 'big')
+        + audio_crc.to_bytes(2, 'big')
+    )
+    tag[pos:pos + len(lame_tag)] = lame_tag
+    pos += len(lame_tag)
+    tag[pos:pos + 2] = crc16(bytes(tag[:pos])).to_bytes(2, 'big')
+    return bytes(tag)
+
+
+def _run_ffmpeg(command: List[str], samples: np.ndarray) -> bytes:
+    """Run ffmpeg with ``samples`` on stdin and return its stdout."""
+    # Pass the array's memory directly instead of copying it into a bytes object
+    data = memoryview(np.ascontiguousarray(samples)).cast('B')
+    result = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        error_output = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"ffmpeg exited with code {result.returncode}: {error_output}")
+    return result.stdout
+
+
+def _input_arguments(converter: str, frame_rate: int, channels: int) -> List[str]:
+    """ffmpeg arguments for reading 16-bit PCM from stdin."""
+    return [
+        converter, "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(frame_rate), "-ac", str(channels), "-i", "pipe:0"
+    ]
+
+
+def resample(samples: np.ndarray, frame_rate: int, output_rate: int, converter: str = "ffmpeg") -> np.ndarray:
+    """
+    Resample 16-bit PCM with ffmpeg's default resampler.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate of ``samples``
+        output_rate: Requested sample rate
+
+    Returns:
+        Resampled (frames, channels) int16 samples
+    """
+    channels = samples.shape[1]
+    command = _input_arguments(converter, frame_rate, channels) + ["-f", "s16le", "-ar", str(output_rate), "pipe:1"]
+    data = _run_ffmpeg(command, samples)
+    return np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+
+
+def _chunk_bounds(total: int, frame_rate: int, workers: int) -> List[Tuple[int, int]]:
+    """Split ``total`` samples into at most ``workers`` frame-aligned ranges."""
+    spf = frame_samples(frame_rate)
+    total_frames = -(-total // spf)
+    min_frames = -(-MIN_CHUNK_SECONDS * frame_rate // spf)
+    chunks = max(1, min(workers, total_frames // min_frames))
+    per_chunk = -(-total_frames // chunks) * spf
+    return [(start, min(total, start + per_chunk)) for start in range(0, total, per_chunk)]
+
+
+def encode_mp3_parallel(
+    samples: np.ndarray,
+    frame_rate: int,
+    output_file: str,
+    output_rate: Optional[int] = None,
+    parameters: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    converter: str = "ffmpeg"
+) -> str:
+    """
+    Encode PCM to MP3 with one ffmpeg/LAME process per chunk.
+
+    Each chunk is encoded with a few frames of context on either side and
+    without the bit reservoir, so its frames are self-contained and can be
+    concatenated with those of its neighbours.
+
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate of ``samples``
+        output_file: Path of the encoded output
+        output_rate: Sample rate of the MP3 (resampled once up front if it differs)
+        parameters: Extra libmp3lame parameters, e.g. quality settings
+        workers: Concurrent encoder processes (defaults to the CPU count)
+        converter: ffmpeg executable
+
+    Returns:
+        Path of the encoded output
+    """
+    if not len(samples):
+        raise ValueError("No audio to encode")
+    if output_rate and output_rate != frame_rate:
+        samples = resample(samples, frame_rate, output_rate, converter)
+        frame_rate = output_rate
+    channels = samples.shape[1]
+    spf = frame_samples(frame_rate)
+    workers = workers or os.cpu_count() or 1
+    bounds = _chunk_bounds(len(samples), frame_rate, workers)
+    command = _input_arguments(converter, frame_rate, channels) + [
+        "-c:a", "libmp3lame"
+    ] + (parameters or []) + [
+        "-reservoir", "0", "-f", "mp3", "-write_xing", "0", "-id3v2_version", "0", "-map_metadata", "-1", "pipe:1"
+    ]
+
+    def encode_chunk(index: int) -> List[bytes]:
+        start, end = bounds[index]
+        last = index == len(bounds) - 1
+        lo = max(0, start - PREROLL_FRAMES * spf)
+        hi = len(samples) if last else min(len(samples), end + POSTROLL_FRAMES * spf)
+        frames = split_frames(_run_ffmpeg(command, samples[lo:hi]))
+        skip = (start - lo) // spf
+        if last:
+            return frames[skip:]
+        keep = (end - start) // spf
+        if len(frames) < skip + keep:
+            raise RuntimeError(f"Encoder returned {len(frames)} frames for chunk {index}, expected {skip + keep}")
+        return frames[skip:skip + keep]
+
+    # Threads are enough here: each one only waits on its own ffmpeg process
+    with ThreadPoolExecutor(max_workers=min(workers, len(bounds))) as executor:
+        frames = [frame for chunk in executor.map(encode_chunk, range(len(bounds))) for frame in chunk]
+
+    with open(output_file, 'wb') as f:
+        f.write(info_frame(frames, len(samples), frame_rate))
+        for frame in frames:
+            f.write(frame)
+    return output_file
@@ -0,0 +1,231 @@
+"""
+PDF text extraction.
+Pages are produced lazily, so extraction stops as soon as enough text for
+the prompt budget has been read. Small documents are read page by page in
+the calling thread; long ones are split into page ranges that are extracted
+by a pool of worker processes and reassembled in page order. Extracted text
+can be cached by PDF content, so re-uploads of a paper skip parsing. The
+library that parses the PDF is one of the engines in pdf_engines.
+"""
+import os
+import math
+import zlib
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from disk_cache import DiskLRUCache, hash_key
+from pdf_engines import get_engine
+
+# Part of the cache key, with the engine version; bump when a change here
+# alters the extracted text
+EXTRACTOR_VERSION = "3"
+
+# Separator between the text of consecutive pages (form feed, as pdftotext)
+PAGE_BREAK = "\f"
+
+# Cache entry markers: text of the whole document, or of its first pages
+COMPLETE = b"C"
+PARTIAL = b"P"
+
+# Documents with fewer pages than this are extracted serially: below it the
+# cost of starting worker processes outweighs the parallel speedup
+DEFAULT_PARALLEL_MIN_PAGES = 40
+
+# Most worker processes used for one document
+DEFAULT_MAX_WORKERS = 4
+
+# Page ranges queued per worker. Several small ranges per worker, rather
+# than one large one, let an early stop skip the ranges not yet started.
+RANGES_PER_WORKER = 4
+
+# Rough characters per LLM token of English prose, for token budgets
+CHARS_PER_TOKEN = 4
+
+
+def _extract_range(engine: str, pdf_path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of a range of pages. Runs in a worker process.
+
+    Args:
+        engine: Name of the extraction engine
+        pdf_path: Path to the PDF file
+        start: First page (0-based)
+        stop: Page after the last one
+
+    Returns:
+        Text of each page in the range
+    """
+    return list(get_engine(engine).iter_pages(pdf_path, start, stop))
+
+
+def page_ranges(pages: int, ranges: int) -> List[Tuple[int, int]]:
+    """
+    Split a document into contiguous page ranges.
+
+    Args:
+        pages: Number of pages in the document
+        ranges: Number of ranges wanted
+
+    Returns:
+        (start, stop) of each range, in page order
+    """
+    size = max(1, math.ceil(pages / max(1, ranges)))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def default_workers() -> int:
+    """Number of extraction processes to use on this machine."""
+    return max(1, min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def iter_pages(
+    pdf_path: str,
+    workers: Optional[int] = None,
+    parallel_min_pages: int = DEFAULT_PARALLEL_MIN_PAGES,
+    engine: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF file, in page order.
+
+    Pages are only extracted as they are consumed; closing the generator
+    early stops the work (in parallel mode, ranges not yet started are
+    cancelled).
+
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Worker processes for long documents (None picks from the CPU count, 1 disables)
+        parallel_min_pages: Page count from which the worker pool is used
+        engine: Extraction engine name (None for pdf_engines.DEFAULT_ENGINE)
+
+    Yields:
+        Text of one page
+    """
+    extractor = get_engine(engine)
+    workers = default_workers() if workers is None else max(1, workers)
+    pages = extractor.page_count(pdf_path) if workers > 1 else 0
+    if pages < max(2, parallel_min_pages):
+        yield from extractor.iter_pages(pdf_path)
+        return
+
+    # Each worker opens the file itself; only page ranges and text cross
+    # the process boundary. Spawned processes do not inherit the threads
+    # of the Streamlit server, which a forked child could deadlock on.
+    ranges = page_ranges(pages, workers * RANGES_PER_WORKER)
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context)
+    try:
+        futures = [pool.submit(_extract_range, extractor.name, pdf_path, start, stop) for start, stop in ranges]
+        for future in futures:
+            yield from future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def file_digest(pdf_path: str) -> str:
+    """
+    Hash the bytes of a file.
+
+    Args:
+        pdf_path: Path to the file
+
+    Returns:
+        SHA-256 hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_get(cache: DiskLRUCache, key: str, budget: Optional[int]) -> Optional[str]:
+    """Look up cached text covering the budget (partial entries only cover smaller budgets)."""
+    data = cache.get(key)
+    if not data:
+        return None
+    try:
+        text = zlib.decompress(data[1:]).decode('utf-8')
+    except (zlib.error, UnicodeDecodeError):
+        return None
+    if data[:1] == COMPLETE or (budget is not None and len(text) >= budget):
+        return text[:budget] if budget is not None else text
+    return None
+
+
+def extract_text(
+    pdf_path: str,
+    workers: Optional[int] = None,
+    parallel_min_pages: int = DEFAULT_PARALLEL_MIN_PAGES,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    cache: Optional[DiskLRUCache] = None,
+    engine: Optional[str] = None
+) -> str:
+    """
+    Extract text content from a PDF file, up to a character or token budget.
+
+    Pages are read until the budget is filled; the pages after that are
+    never parsed. With a cache, the text is stored zlib-compressed under a
+    hash of the PDF bytes and the extractor and engine versions, and a
+    later request for the same file within the cached length is served
+    without parsing.
+
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Worker processes for long documents (None picks from the CPU count, 1 disables)
+        parallel_min_pages: Page count from which the worker pool is used
+        max_chars: Most characters to return (None for no limit)
+        max_tokens: Most estimated LLM tokens to return (None for no limit)
+        cache: Extracted text cache (None disables caching)
+        engine: Extraction engine name (None for pdf_engines.DEFAULT_ENGINE)
+
+    Returns:
+        Text of the pages read, each followed by a newline and separated by
+        PAGE_BREAK, cut to the budget
+    """
+    limits = [max_chars] if max_chars is not None else []
+    if max_tokens is not None:
+        limits.append(max_tokens * CHARS_PER_TOKEN)
+    budget = min(limits) if limits else None
+
+    cache_key = None
+    if cache:
+        cache_key = hash_key("pdf-text", EXTRACTOR_VERSION, get_engine(engine).version, file_digest(pdf_path))
+        cached = _cache_get(cache, cache_key, budget)
+        if cached is not None:
+            return cached
+
+    texts = []
+    length = 0
+    complete = True
+    pages = iter_pages(pdf_path, workers, parallel_min_pages, engine)
+    try:
+        for text in pages:
+            texts.append(text + "\n")
+            length += len(text) + 2
+            if budget is not None and length >= budget:
+                complete = False
+                break
+    finally:
+        pages.close()
+
+    text = PAGE_BREAK.join(texts)
+    if cache_key:
+        # The untruncated pages are kept, so a later larger budget may still hit
+        cache.put(cache_key, (COMPLETE if complete else PARTIAL) + zlib.compress(text.encode('utf-8'), 6))
+    return text[:budget] if budget is not None else text
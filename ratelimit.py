@@ -0,0 +1,366 @@
+"""
+Rate and concurrency limiting for Google API calls.
+Token buckets live in a small SQLite database, so concurrent jobs draw from
+one Google API quota instead of each hitting it independently; an adaptive
+(AIMD) limiter tunes how many requests one job keeps in flight.
+"""
+import os
+import re
+import random
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from disk_cache import hash_key
+
+# Database path
+RATE_LIMIT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ratelimit.db')
+
+# Back-off after a quota error that does not say how long to wait, in seconds
+DEFAULT_BACKOFF_SECONDS = 30.0
+
+# Longest single sleep while waiting for a token, so newly freed capacity is noticed
+MAX_POLL_SECONDS = 1.0
+
+# Weight of each healthy response in the adaptive limiter's latency baseline
+BASELINE_WEIGHT = 0.1
+
+# Healthy responses needed before the adaptive limiter judges latency
+BASELINE_MIN_SAMPLES = 10
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when no token became available within the allowed wait."""
+
+
+def bucket_key(kind: str, api_key: Optional[str]) -> str:
+    """
+    Build a bucket name for one kind of request made with one API key.
+
+    The key itself is never stored, only a short hash of it.
+
+    Args:
+        kind: Request kind, e.g. "tts" or "llm"
+        api_key: Google API key the requests are billed to
+
+    Returns:
+        Bucket name
+    """
+    return f"{kind}:{hash_key(api_key or '')[:16]}"
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is a quota / rate limit rejection (HTTP 429)."""
+    if getattr(error, 'code', None) == 429:
+        return True
+    return 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Check whether an exception signals an overloaded service (HTTP 429 or 5xx)."""
+    code = getattr(error, 'code', None)
+    return is_rate_limit_error(error) or (isinstance(code, int) and 500 <= code < 600)
+
+
+def retry_delay(error: Exception) -> Optional[float]:
+    """Extract the server-suggested retry delay in seconds from a quota error, if any."""
+    match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(error))
+    return float(match.group(1)) if match else None
+
+
+def jittered_backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Delay before a retry, exponential in the attempt with full jitter.
+
+    Spreading retries uniformly over ``[0, min(cap, base * 2**attempt)]``
+    keeps workers that failed together from retrying in lockstep.
+
+    Args:
+        attempt: Zero-based retry number
+        base: Delay ceiling of the first retry, in seconds
+        cap: Largest delay ceiling, in seconds
+
+    Returns:
+        Seconds to wait
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimiter:
+    """
+    Token buckets stored in SQLite and shared across threads and processes.
+
+    Each bucket refills at ``requests_per_minute`` up to ``burst`` tokens.
+    A quota error reported through ``backoff`` blocks the bucket for every
+    process until the back-off has passed, turning the error into
+    back-pressure instead of a burst of failing requests.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        burst: Optional[float] = None,
+        db_path: Optional[str] = None,
+        max_wait: float = 600.0
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Steady request rate per bucket (None only honours back-offs)
+            burst: Bucket capacity (defaults to one second's worth of requests, at least 1)
+            db_path: SQLite database shared by all processes
+            max_wait: Longest time acquire() waits before giving up, in seconds
+        """
+        self.rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self.capacity = burst or max(1.0, self.rate or 1.0)
+        self.db_path = db_path or os.environ.get('RATE_LIMIT_DB', RATE_LIMIT_DB_PATH)
+        self.max_wait = max_wait
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0
+                )
+            ''')
+
+    @contextmanager
+    def _connection(self):
+        """Context manager for an autocommit connection (transactions are explicit)."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _state(self, conn: sqlite3.Connection, key: str, now: float) -> Tuple[float, float]:
+        """
+        Read a bucket's refilled token count and the seconds until one may be taken.
+
+        Returns:
+            Tuple of (tokens, wait); wait is 0 if a token is available now
+        """
+        row = conn.execute(
+            'SELECT tokens, updated, blocked_until FROM buckets WHERE key = ?', (key,)
+        ).fetchone()
+        tokens, updated, blocked_until = row if row else (self.capacity, now, 0.0)
+        if not self.rate:
+            return self.capacity, max(0.0, blocked_until - now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if now < blocked_until:
+            return tokens, blocked_until - now
+        if tokens >= 1:
+            return tokens, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    def _take(self, key: str) -> float:
+        """
+        Try to take one token from a bucket.
+
+        The bucket is read without a lock first; the write transaction is
+        only opened when a token is available to consume, and not at all
+        without a steady rate (then only back-offs are checked).
+
+        Returns:
+            0 if a token was taken, otherwise the seconds to wait before trying again
+        """
+        with self._connection() as conn:
+            _, wait = self._state(conn, key, time.time())
+            if wait > 0 or not self.rate:
+                return wait
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have taken the token since the read
+                now = time.time()
+                tokens, wait = self._state(conn, key, now)
+                if wait <= 0:
+                    conn.execute('''
+                        INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?)
+                        ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+                    ''', (key, tokens - 1, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def acquire(self, key: str) -> float:
+        """
+        Wait until a request may be sent for a bucket.
+
+        Args:
+            key: Bucket name (see bucket_key)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If no token became available within ``max_wait``
+        """
+        start = time.monotonic()
+        while True:
+            wait = self._take(key)
+            waited = time.monotonic() - start
+            if wait <= 0:
+                return waited
+            if waited + wait > self.max_wait:
+                raise RateLimitTimeout(f"Rate limit for {key} not lifted within {self.max_wait:.0f}s")
+            time.sleep(min(wait, MAX_POLL_SECONDS))
+
+    def backoff(self, key: str, seconds: Optional[float] = None) -> None:
+        """
+        Block a bucket for every process after a quota error.
+
+        Args:
+            key: Bucket name
+            seconds: How long to block (defaults to DEFAULT_BACKOFF_SECONDS)
+        """
+        seconds = seconds or DEFAULT_BACKOFF_SECONDS
+        with self._connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                conn.execute('''
+                    INSERT INTO buckets (key, tokens, updated, blocked_until) VALUES (?, 0, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        tokens = 0,
+                        updated = excluded.updated,
+                        blocked_until = MAX(blocked_until, excluded.blocked_until)
+                ''', (key, now, now + seconds))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on requests in flight.
+
+    Every healthy response widens the window by ``1 / window`` (one slot per
+    window's worth of successes). An overload error or a response much slower
+    than usual shrinks it by ``decrease``, at most once per window of
+    requests: responses to requests started before the last cut do not cut
+    again.
+
+    "Usual" is a rolling linear fit of latency against request size
+    (fixed overhead plus time per unit of work) over healthy responses, so
+    short requests, dominated by the overhead, are not judged slow against
+    the per-character speed of long ones.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 16,
+        decrease: float = 0.5,
+        latency_tolerance: float = 3.0
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial: Starting window
+            minimum: Smallest window
+            maximum: Largest window
+            decrease: Factor applied to the window on overload
+            latency_tolerance: Latency above this multiple of the usual latency for the request size counts as overload
+        """
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(min(self.maximum, max(minimum, initial)))
+        self._in_flight = 0
+        self._epoch = 0
+        # Exponentially weighted means of work, latency, work^2 and work*latency
+        self._fit: Optional[List[float]] = None
+        self._samples = 0
+        self._decreases = 0
+        self._condition = threading.Condition()
+
+    @property
+    def window(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def _expected_latency(self, work: float) -> Optional[float]:
+        """Usual latency of a request of this size, from the rolling fit. Caller must hold the lock."""
+        if self._fit is None or self._samples < BASELINE_MIN_SAMPLES:
+            return None
+        mean_work, mean_latency, mean_work2, mean_cross = self._fit
+        variance = mean_work2 - mean_work * mean_work
+        if variance <= 1e-9 * max(1.0, mean_work2):
+            return mean_latency
+        per_work = max(0.0, (mean_cross - mean_work * mean_latency) / variance)
+        overhead = max(0.0, mean_latency - per_work * mean_work)
+        return overhead + per_work * work
+
+    def _update_fit(self, work: float, latency: float) -> None:
+        """Add a healthy response to the rolling fit. Caller must hold the lock."""
+        sample = [work, latency, work * work, work * latency]
+        self._samples += 1
+        if self._fit is None:
+            self._fit = sample
+        else:
+            self._fit = [(1 - BASELINE_WEIGHT) * old + BASELINE_WEIGHT * new for old, new in zip(self._fit, sample)]
+
+    def acquire(self) -> int:
+        """
+        Wait for a free slot in the window.
+
+        Returns:
+            Ticket to pass to release()
+        """
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            return self._epoch
+
+    def release(self, ticket: int, latency: float, error: Optional[Exception] = None, work: float = 1.0) -> None:
+        """
+        Free a slot and adapt the window to how the request went.
+
+        Args:
+            ticket: Value returned by acquire()
+            latency: Request duration in seconds
+            error: Exception raised by the request, if any
+            work: Size of the request (e.g. characters), so latency is compared with requests of that size
+        """
+        with self._condition:
+            self._in_flight -= 1
+            expected = self._expected_latency(work)
+            slow = expected is not None and latency > self.latency_tolerance * expected
+            if (error is not None and is_overload_error(error)) or (error is None and slow):
+                if ticket == self._epoch:
+                    self._limit = max(float(self.minimum), self._limit * self.decrease)
+                    self._epoch += 1
+                    self._decreases += 1
+                    print(f"Overload detected, concurrency window -> {self.window}")
+            elif error is None:
+                self._limit = min(float(self.maximum), self._limit + 1 / self._limit)
+                # Typical latency, tracked over healthy responses only
+                self._update_fit(work, latency)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter metrics.
+
+        Returns:
+            Dictionary with the current window, requests in flight and number of decreases
+        """
+        with self._condition:
+            return {
+                "window": self.window,
+                "in_flight": self._in_flight,
+                "decreases": self._decreases,
+            }
@@ -0,0 +1,197 @@
+"""
+Per-job manifest of the audio segments synthesized for a dialogue.
+Lets an interrupted audio stage resume without repeating finished TTS
+requests and gives the mixer the segment files in dialogue order.
+"""
+import os
+import json
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from disk_cache import hash_key
+
+# Manifest file name inside the job's segment directory
+MANIFEST_FILENAME = "manifest.json"
+
+# Segment states
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def text_hash(speaker: str, text: str) -> str:
+    """
+    Hash a dialogue line, so a changed script invalidates its segment.
+
+    Args:
+        speaker: Name of the speaker
+        text: Dialogue text
+
+    Returns:
+        Hex digest of the line
+    """
+    return hash_key(speaker, text)
+
+
+class SegmentManifest:
+    """
+    JSON record of every segment: text hash, voice, status, path and the
+    dialogue lines it covers.
+
+    The file is rewritten atomically (temp file + rename) after every
+    change, so it is consistent even if the process is killed mid-job.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Load the manifest of a segment directory, if there is one.
+
+        Args:
+            directory: Job segment directory holding the manifest
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self.entries = {int(entry["index"]): entry for entry in data.get("segments", [])}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable segment manifest {self.path}: {str(e)}")
+
+    def _save(self) -> None:
+        """Write the manifest atomically. Caller must hold the lock."""
+        os.makedirs(self.directory, exist_ok=True)
+        data = {"segments": [self.entries[index] for index in sorted(self.entries)]}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _is_complete(self, entry: Optional[Dict[str, Any]], line_hash: str, voice: str) -> bool:
+        """Check that an entry is a finished segment of this exact line and voice."""
+        return (
+            entry is not None
+            and entry.get("status") == DONE
+            and entry.get("text_hash") == line_hash
+            and entry.get("voice") == voice
+            and bool(entry.get("path"))
+            and os.path.exists(entry["path"])
+        )
+
+    def begin(
+        self,
+        lines: Iterable[Tuple[int, str, str, str]],
+        sources: Optional[Dict[int, List[int]]] = None
+    ) -> None:
+        """
+        Start a run over a dialogue.
+
+        Finished segments of unchanged lines are kept; every other line is
+        marked pending and entries for lines no longer in the dialogue are
+        dropped.
+
+        Args:
+            lines: (index, speaker, text, voice_name) of every segment to synthesize
+            sources: Original dialogue indices covered by each segment, if re-chunked
+        """
+        sources = sources or {}
+        with self._lock:
+            entries = {}
+            for index, speaker, text, voice_name in lines:
+                line_hash = text_hash(speaker, text)
+                entry = self.entries.get(index)
+                if not self._is_complete(entry, line_hash, voice_name):
+                    entry = {
+                        "index": index,
+                        "speaker": speaker,
+                        "text_hash": line_hash,
+                        "voice": voice_name,
+                        "status": PENDING,
+                        "path": None,
+                    }
+                entry["source_indices"] = sources.get(index, [index])
+                entries[index] = entry
+            self.entries = entries
+            self._save()
+
+    def completed(self, index: int, speaker: str, text: str, voice_name: str) -> Optional[str]:
+        """
+        Get the segment file of a line finished by an earlier run.
+
+        Returns:
+            Segment file path, or None if the line still has to be synthesized
+        """
+        with self._lock:
+            entry = self.entries.get(index)
+            if self._is_complete(entry, text_hash(speaker, text), voice_name):
+                return entry["path"]
+            return None
+
+    def mark(
+        self,
+        index: int,
+        speaker: str,
+        text: str,
+        voice_name: str,
+        status: str,
+        path: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Record the outcome of a line.
+
+        Args:
+            index: Position of the line in the dialogue
+            speaker: Name of the speaker
+            text: Dialogue text
+            voice_name: Google TTS voice used
+            status: DONE, FAILED or PENDING
+            path: Segment file (None for in-memory segments)
+            error: Error message of a failed line
+        """
+        entry = {
+            "index": index,
+            "speaker": speaker,
+            "text_hash": text_hash(speaker, text),
+            "voice": voice_name,
+            "status": status,
+            "path": path,
+        }
+        if error is not None:
+            entry["error"] = error
+        with self._lock:
+            entry["source_indices"] = self.entries.get(index, {}).get("source_indices", [index])
+            self.entries[index] = entry
+            self._save()
+
+    def segment_files(self) -> List[str]:
+        """
+        Get the finished segment files in dialogue order.
+
+        Returns:
+            Paths of all finished segments that have a file, ordered by index
+        """
+        with self._lock:
+            return [
+                entry["path"] for index, entry in sorted(self.entries.items())
+                if entry.get("status") == DONE and entry.get("path")
+            ]
+
+    def failures(self) -> List[Dict[str, Any]]:
+        """
+        Get the lines that failed in the last run.
+
+        Returns:
+            Manifest entries with status FAILED, ordered by index
+        """
+        with self._lock:
+            return [entry for _, entry in sorted(self.entries.items()) if entry.get("status") == FAILED]
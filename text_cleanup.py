@@ -0,0 +1,194 @@
+"""
+Cleanup of extracted PDF text before it is sent to the agents.
+Removes what PDF extraction adds on top of the paper's prose (running
+headers and footers, page numbers, ligature characters, broken hyphenation,
+table and figure debris, runs of whitespace) so none of it is paid for in
+prompt tokens.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from pdf_extract import PAGE_BREAK
+
+# Ligatures and invisible characters left by PDF fonts
+CHARACTER_FIXES = str.maketrans({
+    "\ufb00": "ff",
+    "\ufb01": "fi",
+    "\ufb02": "fl",
+    "\ufb03": "ffi",
+    "\ufb04": "ffl",
+    "\ufb05": "st",
+    "\ufb06": "st",
+    "\u00a0": " ",  # no-break space
+    "\u00ad": None,  # soft hyphen
+    "\u200b": None,  # zero-width space
+    "\u200c": None,  # zero-width non-joiner
+    "\u200d": None,  # zero-width joiner
+    "\ufeff": None,  # byte order mark
+})
+
+# Lines at the top and bottom of a page that can be running headers/footers
+EDGE_LINES = 3
+
+# A header/footer repeats on at least this many pages and this share of them
+REPEAT_MIN_PAGES = 3
+REPEAT_MIN_SHARE = 0.3
+
+# Lines whose non-space characters are less than this share letters are
+# table cells, axis labels or garbled figure text
+MIN_ALPHA_RATIO = 0.5
+
+# Shorter lines are kept: "2020." or "(n = 1,024)." wrapped from a sentence
+DEBRIS_MIN_TOKENS = 3
+
+# Prefixes that form hyphenated compounds ("self-attention", "well-known"),
+# so their hyphen is kept when they are split at a line end
+COMPOUND_PREFIXES = {
+    "all", "anti", "co", "cross", "end", "few", "fine", "full", "half", "high", "long", "low", "multi",
+    "non", "one", "open", "post", "pre", "real", "self", "semi", "short", "single", "state", "two",
+    "well", "zero",
+}
+
+PAGE_NUMBER = re.compile(r"^(?:page\s*)?[-–(]?\s*\d{1,4}\s*[-–)]?(?:\s*(?:of|/)\s*\d{1,4})?$", re.IGNORECASE)
+DIGITS = re.compile(r"\d+")
+SPACES = re.compile(r"[ \t\r\v]+")
+LETTERS = re.compile(r"[^\W\d_]")
+WORDS = re.compile(r"\w+(?:-\w+)*")
+HYPHENATED = re.compile(r"([\w-]*\w)-\n[ \t]*([a-z]\w*)")
+# A word hyphenated across a page break; the rest of its line moves before the break
+HYPHENATED_PAGE = re.compile(r"([\w-]*\w)-\n\f\n[ \t]*([a-z]\w*)([^\n]*)(\n|$)")
+# Line ends after which the next line continues the sentence
+CONTINUED = re.compile(r"[a-z,;:(=+\-–]$")
+BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class CleanupResult(BaseModel):
+    """Cleaned text and what the cleanup removed."""
+    text: str
+    input_chars: int
+    removed_chars: int
+    removed: Dict[str, int] = Field(default_factory=dict)  # Characters removed by each step
+
+
+def _normalize(line: str) -> str:
+    """Key of a line for header/footer detection; page numbers do not count."""
+    return SPACES.sub(" ", DIGITS.sub("#", line.strip().lower()))
+
+
+def _edge_lines(lines: List[str]) -> List[str]:
+    """First and last non-empty lines of a page."""
+    content = [line for line in lines if line.strip()]
+    return content[:EDGE_LINES] + content[-EDGE_LINES:]
+
+
+def _is_debris(line: str) -> bool:
+    """Check whether a line is mostly digits and symbols rather than words."""
+    chars = len(line) - line.count(" ")
+    return chars > 0 and len(LETTERS.findall(line)) < MIN_ALPHA_RATIO * chars
+
+
+def _drop_debris(lines: List[str]) -> List[str]:
+    """Drop debris lines, except short ones and ones continuing the sentence of the line before."""
+    kept = []
+    previous: Optional[str] = None  # Last non-empty line, if it is prose
+    for line in lines:
+        stripped = line.strip()
+        if line == PAGE_BREAK or not stripped:
+            kept.append(line)
+            continue
+        debris = _is_debris(line)
+        continues = previous is not None and CONTINUED.search(previous)
+        if not debris or continues or len(stripped.split()) < DEBRIS_MIN_TOKENS:
+            kept.append(line)
+        previous = None if debris else stripped
+    return kept
+
+
+def _rejoin(prefix: str, suffix: str, hyphenated: Set[str], words: Set[str]) -> str:
+    """
+    Join a word split at a line end, keeping the hyphen of compounds.
+
+    The hyphen is kept when the prefix already has one ("state-of-the-"),
+    when the document spells the word with a hyphen elsewhere, or when the
+    prefix is a compound prefix ("self-", "well-") and the document never
+    spells the word without one.
+    """
+    joined = prefix + suffix
+    if "-" in prefix or f"{prefix}-{suffix}".lower() in hyphenated:
+        return f"{prefix}-{suffix}"
+    if joined.lower() not in words and prefix.lower() in COMPOUND_PREFIXES:
+        return f"{prefix}-{suffix}"
+    return joined
+
+
+def clean_text(text: str) -> CleanupResult:
+    """
+    Clean extracted PDF text.
+
+    Steps, in order: fix ligatures and invisible characters; drop running
+    headers and footers (edge lines repeated across pages) and page numbers;
+    drop lines that are mostly digits and symbols (unless they are short or
+    continue the sentence before); rejoin words hyphenated across lines,
+    keeping the hyphen of compounds; collapse runs of spaces and blank lines. Page breaks are
+    kept, each on a line of its own, so stamps at page edges can still be
+    found by context_selection.split_sections.
+
+    Args:
+        text: Extracted text, pages separated by PAGE_BREAK
+
+    Returns:
+        CleanupResult with the cleaned text and characters removed per step
+    """
+    removed: Dict[str, int] = {}
+    size = len(text)
+
+    def record(step: str, new_text: str) -> str:
+        nonlocal size
+        removed[step] = size - len(new_text)
+        size = len(new_text)
+        return new_text
+
+    text = record("characters", text.translate(CHARACTER_FIXES))
+
+    pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+    repeats = Counter()
+    for lines in pages:
+        repeats.update({_normalize(line) for line in _edge_lines(lines)})
+    min_pages = max(REPEAT_MIN_PAGES, REPEAT_MIN_SHARE * len(pages))
+    running = {key for key, count in repeats.items() if key and count >= min_pages}
+
+    kept_pages = []
+    for lines in pages:
+        edges = set(_edge_lines(lines))
+        kept_pages.append([
+            line for line in lines
+            if not (line in edges and (_normalize(line) in running or PAGE_NUMBER.match(line.strip())))
+        ])
+    # Every page ends with a newline, so the break goes on a line of its own
+    text = record("headers_footers", (PAGE_BREAK + "\n").join("\n".join(lines) for lines in kept_pages))
+
+    text = record("debris", "\n".join(_drop_debris(text.split("\n"))))
+
+    # Spellings of the document's words on a single line decide whether a split word keeps its hyphen
+    spellings = {word.lower() for word in WORDS.findall(text)}
+    hyphenated = {word for word in spellings if "-" in word}
+    text = HYPHENATED_PAGE.sub(
+        lambda match: _rejoin(match[1], match[2], hyphenated, spellings) + match[3] + "\n\f" + match[4], text
+    )
+    text = record("hyphenation", HYPHENATED.sub(
+        lambda match: _rejoin(match[1], match[2], hyphenated, spellings), text
+    ))
+    text = SPACES.sub(" ", text)
+    text = "\n".join(line if line == PAGE_BREAK else line.strip() for line in text.split("\n"))
+    text = record("whitespace", BLANK_LINES.sub("\n\n", text).strip() + "\n")
+
+    input_chars = sum(removed.values()) + len(text)
+    return CleanupResult(
+        text=text,
+        input_chars=input_chars,
+        removed_chars=input_chars - len(text),
+        removed=removed
+    )
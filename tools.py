@@ -3,19 +3,299 @@ Audio generation and mixing tools for podcast production.
 Using Google TTS models.
 """
 import os
+import re
+import math
+import time
 import wave
 import warnings
-from typing import Dict, List, Optional, Any
+import subprocess
+import tempfile
+import threading
+from queue import Queue
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple, Union
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from pydub import AudioSegment
+from pydub.utils import db_to_float
 from pydantic import Field, BaseModel, ConfigDict
-from google import genai
 from google.genai import types
+from client_pool import get_client
+from disk_cache import DiskLRUCache, hash_key
+from loudness import TARGET_TOLERANCE_LU, normalize_group
+from mp3_encoder import encode_mp3_parallel
+from segment_manifest import DONE, FAILED, SegmentManifest
+from ratelimit import (
+    DEFAULT_BACKOFF_SECONDS,
+    AdaptiveConcurrencyLimiter,
+    RateLimiter,
+    RateLimitTimeout,
+    bucket_key,
+    is_rate_limit_error,
+    jittered_backoff,
+    retry_delay
+)
 
 # Suppress function_call warnings from Google TTS
 warnings.filterwarnings('ignore', message='.*non-text parts in the response.*')
 warnings.filterwarnings('ignore', message='.*function_call.*')
 
+# Google TTS model used for speech synthesis
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+
+# Silence inserted before every segment after the first, in milliseconds
+SEGMENT_GAP_MS = 200
+
+# Splitting batched multi-speaker TTS audio back into lines
+TURN_LEVEL_WINDOW_MS = 10  # Level detection window
+TURN_MIN_GAP_MS = 120  # Shortest pause accepted as a turn boundary
+TURN_SILENCE_DB = 35.0  # Pause threshold, below the loud (95th percentile) level
+TURN_SILENCE_FLOOR_DB = -50.0  # dBFS; always treated as silence below this
+
+# Boundaries tried, in order, when splitting a long line: sentences, clauses, words
+TEXT_SPLIT_PATTERNS = (r"(?<=[.!?])\s+", r"(?<=[,;:])\s+", r"\s+")
+
+# ffmpeg parameters for the final podcast encode
+FINAL_EXPORT_PARAMETERS = [
+    "-q:a", "0"  # Highest quality
+]
+
+
+# --- Sample-buffer helpers ---
+# These mirror pydub's millisecond-based slicing and fading arithmetic so that
+# the numpy mixer produces the same samples as AudioSegment.append().
+
+def _samples(audio: AudioSegment) -> np.ndarray:
+    """Get the samples of a 16-bit AudioSegment as a (frames, channels) int16 array."""
+    return np.frombuffer(audio.raw_data, dtype=np.int16).reshape(-1, audio.channels)
+
+
+def _frame_index(ms: float, frame_rate: int) -> int:
+    """Frame index of a millisecond position, truncated like pydub."""
+    return int(ms * (frame_rate / 1000.0))
+
+
+def _length_ms(frames: int, frame_rate: int) -> int:
+    """Length in milliseconds of a frame count, rounded like pydub's len()."""
+    return round(1000 * (float(frames) / frame_rate))
+
+
+def _slice_ms(samples: np.ndarray, start_ms: int, end_ms: int, frame_rate: int, offset: int = 0) -> np.ndarray:
+    """
+    Slice samples by milliseconds like AudioSegment[start:end].
+    
+    A partially available range is padded with silence up to the expected
+    length; a range entirely past the end yields no frames. ``offset`` is the
+    absolute frame position of ``samples[0]`` when slicing a window of a
+    longer signal.
+    """
+    start = _frame_index(start_ms, frame_rate)
+    end = _frame_index(end_ms, frame_rate)
+    data = samples[start - offset:max(end - offset, 0)]
+    missing = (end - start) - len(data)
+    if missing > 0 and len(data):
+        data = np.concatenate([data, np.zeros((missing, samples.shape[1]), dtype=samples.dtype)])
+    return data
+
+
+def _apply_gain(samples: np.ndarray, gains: np.ndarray) -> np.ndarray:
+    """Scale int16 samples by per-frame linear gains, rounding like audioop.mul."""
+    scaled = np.floor(samples.astype(np.float64) * gains[:, np.newaxis])
+    return np.clip(scaled, -32768, 32767).astype(np.int16)
+
+
+def _fade(samples: np.ndarray, frame_rate: int, from_gain: float = 0, to_gain: float = 0) -> np.ndarray:
+    """
+    Fade samples over their whole length like AudioSegment.fade(start=0, end=inf).
+    
+    Fades longer than 100 ms use one gain step per millisecond, shorter ones
+    one gain step per frame.
+    """
+    duration = _length_ms(len(samples), frame_rate)
+    from_power = db_to_float(from_gain)
+    gain_delta = db_to_float(to_gain) - from_power
+    
+    if duration > 100:
+        scale_step = gain_delta / duration
+        ms_gains = from_power + scale_step * np.arange(duration)
+        bounds = (np.arange(duration + 1) * (frame_rate / 1000.0)).astype(np.int64)
+        counts = np.diff(bounds)
+        # A millisecond chunk straddling the end is padded; chunks past the end are dropped
+        partial = np.nonzero(bounds[1:] > len(samples))[0]
+        if len(partial):
+            first = partial[0]
+            length = bounds[first + 1] if bounds[first] < len(samples) else bounds[first]
+        else:
+            length = bounds[-1]
+        frames = np.zeros((length, samples.shape[1]), dtype=samples.dtype)
+        available = min(length, len(samples))
+        frames[:available] = samples[:available]
+        gains = np.repeat(ms_gains, counts)[:length]
+        return _apply_gain(frames, gains)
+    
+    fade_frames = duration * (frame_rate / 1000.0)
+    if not fade_frames:
+        return samples[:0]
+    scale_step = gain_delta / fade_frames
+    length = min(int(fade_frames), len(samples))
+    gains = from_power + scale_step * np.arange(length)
+    return _apply_gain(samples[:length], gains)
+
+
+def _overlay(base: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """Overlay samples like AudioSegment * AudioSegment (looped, saturating add)."""
+    if not len(other):
+        return base.copy()
+    looped = np.resize(other, base.shape)
+    mixed = base.astype(np.int32) + looped.astype(np.int32)
+    return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+
+def _turn_boundaries(samples: np.ndarray, frame_rate: int, weights: List[int]) -> Optional[List[int]]:
+    """
+    Find where to cut audio of several consecutive dialogue lines.
+    
+    Lines are assumed to take time in proportion to ``weights`` (their
+    character counts). Every boundary is placed in the middle of a pause
+    close to its expected position; among the pauses that fit, the
+    combination with the most total silence wins.
+    
+    Args:
+        samples: (frames, channels) int16 samples
+        frame_rate: Sample rate
+        weights: Relative length of each line
+        
+    Returns:
+        ``len(weights) - 1`` frame offsets to cut at, or None if no consistent set of pauses exists
+    """
+    cuts = len(weights) - 1
+    if cuts <= 0:
+        return []
+    window = max(1, frame_rate * TURN_LEVEL_WINDOW_MS // 1000)
+    count = len(samples) // window
+    if count == 0:
+        return None
+    blocks = samples[:count * window].astype(np.float64).reshape(count, -1) / 32768.0
+    levels = 10 * np.log10((blocks ** 2).mean(axis=1) + 1e-12)
+    threshold = max(TURN_SILENCE_FLOOR_DB, np.percentile(levels, 95) - TURN_SILENCE_DB)
+    speech = np.flatnonzero(levels > threshold)
+    if not len(speech):
+        return None
+    first, last = speech[0], speech[-1] + 1
+    
+    # Pauses strictly between the first and the last speech window
+    quiet = np.concatenate([[False], levels[first:last] <= threshold, [False]])
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    starts, ends = edges[::2] + first, edges[1::2] + first
+    lengths = ends - starts
+    keep = lengths * TURN_LEVEL_WINDOW_MS >= TURN_MIN_GAP_MS
+    starts, lengths = starts[keep], lengths[keep]
+    if len(starts) < cuts:
+        return None
+    middles = starts + lengths / 2
+    
+    # Expected boundary positions, and how far a boundary may drift from them
+    shares = np.asarray(weights, dtype=np.float64) / sum(weights)
+    span = last - first
+    expected = first + span * np.cumsum(shares)[:-1]
+    tolerance = span * np.minimum(shares[:-1], shares[1:]) / 2
+    
+    # Dynamic programming over increasing pause indices, maximizing total silence
+    score = np.full((cuts, len(starts)), -np.inf)
+    previous = np.zeros((cuts, len(starts)), dtype=np.int64)
+    score[0] = np.where(np.abs(middles - expected[0]) <= tolerance[0], lengths, -np.inf)
+    for i in range(1, cuts):
+        fits = np.abs(middles - expected[i]) <= tolerance[i]
+        best, best_at = -np.inf, 0
+        for j in range(len(starts)):
+            if fits[j] and np.isfinite(best):
+                score[i][j] = best + lengths[j]
+                previous[i][j] = best_at
+            # Pause j becomes available to the next boundary
+            if score[i - 1][j] > best:
+                best, best_at = score[i - 1][j], j
+    
+    end = int(np.argmax(score[-1]))
+    if not np.isfinite(score[-1][end]):
+        return None
+    chosen = [end]
+    for i in range(cuts - 1, 0, -1):
+        chosen.append(int(previous[i][chosen[-1]]))
+    chosen.reverse()
+    return [int(middles[j] * window) for j in chosen]
+
+
+# --- Dialogue re-chunking ---
+
+def _split_text(text: str, max_chars: int, level: int = 0) -> List[str]:
+    """
+    Split text into about equal pieces of at most ``max_chars`` characters.
+    
+    Sentence boundaries are preferred; a single sentence that is still too
+    long is split at clauses, then at words.
+    """
+    if len(text) <= max_chars or level == len(TEXT_SPLIT_PATTERNS):
+        return [text]
+    units = []
+    for unit in re.split(TEXT_SPLIT_PATTERNS[level], text):
+        units.extend(_split_text(unit, max_chars, level + 1))
+    
+    # Balance the pieces instead of leaving a short tail
+    target = len(text) / math.ceil(len(text) / max_chars)
+    pieces, current = [], ""
+    for unit in units:
+        if current and (len(current) + 1 + len(unit) > max_chars or len(current) >= target):
+            pieces.append(current)
+            current = unit
+        else:
+            current = f"{current} {unit}" if current else unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _rechunk(
+    lines: List[Tuple[int, str, str]],
+    min_chars: int,
+    max_chars: int
+) -> List[Tuple[str, str, List[int]]]:
+    """
+    Re-chunk dialogue lines into TTS requests of a better size.
+    
+    Lines longer than ``max_chars`` are split at sentence boundaries, then
+    adjacent pieces of the same speaker are merged while one of them is
+    shorter than ``min_chars`` and the result fits in ``max_chars``.
+    
+    Args:
+        lines: (dialogue index, speaker, text) of every line, in order
+        min_chars: Pieces shorter than this are merged with a neighbour (0 = no merging)
+        max_chars: Longest piece (0 = no splitting)
+        
+    Returns:
+        (speaker, text, dialogue indices covered) of every chunk, in order
+    """
+    pieces = []
+    for index, speaker, text in lines:
+        parts = _split_text(text, max_chars) if max_chars > 0 else [text]
+        pieces.extend((speaker, part, [index]) for part in parts)
+    if min_chars <= 0:
+        return pieces
+    
+    chunks: List[Tuple[str, str, List[int]]] = []
+    for speaker, text, sources in pieces:
+        if chunks:
+            last_speaker, last_text, last_sources = chunks[-1]
+            short = len(last_text) < min_chars or len(text) < min_chars
+            fits = max_chars <= 0 or len(last_text) + 1 + len(text) <= max_chars
+            if last_speaker == speaker and short and fits:
+                merged_sources = last_sources + [index for index in sources if index not in last_sources]
+                chunks[-1] = (speaker, f"{last_text} {text}", merged_sources)
+                continue
+        chunks.append((speaker, text, sources))
+    return chunks
+
 
 class VoiceConfig(BaseModel):
     """Voice configuration settings for Google TTS."""
@@ -31,6 +311,130 @@ class AudioConfig(BaseModel):
     normalize: bool = True
     target_loudness: float = -14.0
     compression_ratio: float = 2.0
+    max_workers: int = 4  # Concurrent TTS requests per job (1 = serial); starting point when adaptive
+    # "adaptive" widens/narrows TTS requests in flight with latency and errors (AIMD), "fixed" keeps max_workers
+    concurrency: str = "adaptive"
+    max_concurrency: int = 16  # Upper bound of the adaptive window
+    # Pack consecutive lines into multi-speaker TTS requests of up to this many
+    # characters and split the audio at pauses (0 = one request per line)
+    tts_batch_chars: int = 0
+    tts_batch_lines: int = 8  # Most lines per multi-speaker request
+    tts_backend: str = "google"  # "fake" uses the offline stand-in (fake_backends.FakeTTSClient)
+    # Re-chunk the script before synthesis: merge adjacent lines of one speaker
+    # shorter than tts_min_chars, split lines longer than tts_max_chars (0 = off).
+    # Off by default: segments are then numbered by chunk rather than by
+    # dialogue line, which changes segment file names and manifest entries.
+    tts_min_chars: int = 0
+    tts_max_chars: int = 0
+    # TTS requests per minute per API key, shared by every job on the host
+    # (None = no steady limit, only back off together on quota errors)
+    tts_requests_per_minute: Optional[float] = None
+    rate_limit_db: Optional[str] = None  # Shared rate limit store (None = data/ratelimit.db)
+    rate_limit_retries: int = 8  # Quota errors tolerated per request before giving up
+    segment_retries: int = 3  # Extra attempts for a line whose synthesis or processing failed
+    segment_retry_delay: float = 1.0  # Backoff ceiling of the first retry, doubled per attempt (jittered)
+    segment_retry_max_delay: float = 30.0
+    cache_dir: Optional[str] = None  # TTS cache directory (None disables caching)
+    cache_max_bytes: int = 256 * 1024 * 1024
+    pipeline: str = "files"  # "files" writes segment files, "memory" keeps PCM in memory
+    segment_format: str = "wav"  # "wav" keeps segment files lossless, "mp3" encodes them at `bitrate`
+    output_sample_rate: Optional[int] = 48000  # Final podcast rate (None keeps the mix rate)
+    encoder: str = "single"  # "single" runs one ffmpeg encode, "parallel" encodes frame-aligned chunks concurrently
+    encode_workers: Optional[int] = None  # Parallel encoder processes (None = CPU count)
+    output_profiles: List[str] = ["mp3"]  # Names from OUTPUT_PROFILES produced by mix_profiles
+    scratch_dir: Optional[str] = None  # Back the mix buffer with a memory-mapped file here (None = heap)
+    mix_engine: str = "numpy"  # "numpy" mixes into one preallocated buffer, "pydub" appends segment by segment
+    # Where loudness is normalized: "segment" (pydub peak normalize per segment),
+    # "mix" (once over the mixed podcast) or "speaker" (once per speaker before mixing)
+    loudness_mode: str = "mix"
+    compression_threshold: float = -20.0  # dBFS RMS, after gain to target loudness
+    peak_ceiling: float = -1.0  # dBFS
+
+
+class OutputProfile(BaseModel):
+    """Encoding settings for one rendition of the final podcast."""
+    name: str
+    filename: str  # Relative to the mixer output directory (or absolute)
+    format: str = "mp3"  # ffmpeg output format
+    parameters: List[str] = Field(default_factory=list)  # ffmpeg output parameters
+    sample_rate: Optional[int] = None  # None uses AudioConfig.output_sample_rate
+
+
+# Renditions the mixer can produce, by profile name
+OUTPUT_PROFILES: Dict[str, OutputProfile] = {
+    # High-quality download / desktop
+    "mp3": OutputProfile(
+        name="mp3",
+        filename="podcast_final.mp3",
+        format="mp3",
+        parameters=FINAL_EXPORT_PARAMETERS
+    ),
+    # Low-bitrate speech for mobile
+    "opus": OutputProfile(
+        name="opus",
+        filename="podcast_mobile.opus",
+        format="opus",
+        parameters=["-c:a", "libopus", "-b:a", "64k", "-application", "voip"]
+    ),
+    # Segmented rendition for HTTP streaming
+    "hls": OutputProfile(
+        name="hls",
+        filename="hls/podcast.m3u8",
+        format="hls",
+        parameters=["-c:a", "aac", "-b:a", "96k", "-hls_time", "6", "-hls_playlist_type", "vod"]
+    ),
+    # Growing playlist that can be played while later lines are still synthesized
+    # (only progressive with the stream pipeline); segments and playlist are
+    # written under temporary names and renamed, so readers never see partial files
+    "live": OutputProfile(
+        name="live",
+        filename="live/podcast.m3u8",
+        format="hls",
+        parameters=[
+            "-c:a", "aac", "-b:a", "96k", "-hls_time", "4",
+            "-hls_playlist_type", "event", "-hls_flags", "temp_file"
+        ]
+    ),
+}
+
+
+class PCMSegment(BaseModel):
+    """Synthesized dialogue segment kept in memory as raw PCM."""
+    index: int
+    speaker: str
+    pcm: bytes
+    sample_rate: int = 24000
+    channels: int = 1
+    sample_width: int = 2
+    source_indices: List[int] = Field(default_factory=list)  # Dialogue lines covered by the segment
+
+    @classmethod
+    def from_audio_segment(
+        cls,
+        index: int,
+        speaker: str,
+        audio: AudioSegment,
+        source_indices: Optional[List[int]] = None
+    ) -> "PCMSegment":
+        """Build a PCM segment from a pydub AudioSegment."""
+        return cls(
+            index=index,
+            speaker=speaker,
+            pcm=audio.raw_data,
+            sample_rate=audio.frame_rate,
+            channels=audio.channels,
+            sample_width=audio.sample_width,
+            source_indices=source_indices if source_indices is not None else [index]
+        )
+
+    def to_audio_segment(self) -> AudioSegment:
+        """Wrap the PCM data in a pydub AudioSegment without decoding."""
+        return AudioSegment(
+            data=self.pcm,
+            sample_width=self.sample_width,
+            frame_rate=self.sample_rate,
+            channels=self.channels
+        )
 
 
 class Dialogue(BaseModel):
@@ -45,28 +449,62 @@ class PodcastAudioGenerator:
     Synthesizes podcast voices using Google's multi-speaker TTS model.
     """
     
-    def __init__(self, output_dir: str = "output/audio-files"):
+    def __init__(self, output_dir: str = "output/audio-files", audio_config: Optional[AudioConfig] = None):
         """
         Initialize the audio generator.
         
         Args:
             output_dir: Directory to save generated audio files
+            audio_config: Optional audio configuration (defaults to AudioConfig())
         """
-        # Initialize Google genai client
+        # Google genai client, shared with every job using the same API key
         # API key can be passed or read from GOOGLE_API_KEY environment variable
+        self.audio_config = audio_config or AudioConfig()
         api_key = os.getenv("GOOGLE_API_KEY")
-        if api_key:
-            self.client = genai.Client(api_key=api_key)
+        if self.audio_config.tts_backend == "fake":
+            # Deterministic offline audio for load and regression tests
+            from fake_backends import FakeTTSClient
+            self.client = FakeTTSClient.from_env()
         else:
-            # Try without explicit key (may be set elsewhere)
             try:
-                self.client = genai.Client()
+                self.client = get_client(api_key)
             except Exception:
+                if api_key:
+                    raise
                 raise ValueError("GOOGLE_API_KEY environment variable not set")
         self.voice_configs: Dict[str, VoiceConfig] = {}
-        self.audio_config = AudioConfig()
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Status of every line of the job, kept in the segment directory
+        self.manifest = SegmentManifest(self.output_dir)
+        
+        # Dialogue indices covered by each segment of the last run
+        self.sources: Dict[int, List[int]] = {}
+        
+        # Raw PCM cache keyed by model, voice, prompt and request config
+        self.cache: Optional[DiskLRUCache] = None
+        if self.audio_config.cache_dir:
+            self.cache = DiskLRUCache(
+                self.audio_config.cache_dir,
+                max_bytes=self.audio_config.cache_max_bytes,
+                suffix=".pcm"
+            )
+        
+        # Token bucket shared with other jobs using the same API key
+        self.rate_limiter = RateLimiter(
+            self.audio_config.tts_requests_per_minute,
+            db_path=self.audio_config.rate_limit_db
+        )
+        self.rate_limit_key = bucket_key("tts", api_key)
+        
+        # Requests in flight, tuned to how the service responds
+        self.concurrency: Optional[AdaptiveConcurrencyLimiter] = None
+        if self.audio_config.concurrency == "adaptive":
+            self.concurrency = AdaptiveConcurrencyLimiter(
+                initial=self.audio_config.max_workers,
+                maximum=self.audio_config.max_concurrency
+            )
 
     def add_voice(
         self, 
@@ -95,18 +533,8 @@ class PodcastAudioGenerator:
             wf.setframerate(rate)
             wf.writeframes(pcm)
 
-    def generate_audio(self, dialogue: List[Dict[str, str]]) -> List[str]:
-        """
-        Generate audio files for each script segment using Google TTS.
-        
-        Args:
-            dialogue: List of dialogue dictionaries with 'speaker' and 'text' keys
-            
-        Returns:
-            List of generated audio file paths
-        """
-        audio_files = []
-        
+    def _voice_mapping(self) -> Dict[str, str]:
+        """Resolve the speaker -> Google TTS voice name mapping."""
         # Use single-speaker TTS for each segment
         # Get voice mappings for Sarah and Dennis
         sarah_voice_config = self.voice_configs.get("Sarah")
@@ -116,100 +544,641 @@ class PodcastAudioGenerator:
             raise ValueError("Both Sarah and Dennis voice configs must be set")
         
         # Create voice name mapping
-        voice_mapping = {
+        return {
             "Sarah": sarah_voice_config.voice_name,
             "Dennis": dennis_voice_config.voice_name
         }
+
+    def _synthesize_pcm(self, prompt: str, voice_name: str) -> bytes:
+        """
+        Synthesize a prompt with a single Google TTS voice.
         
-        print(f"Voice mapping - Sarah: {voice_mapping['Sarah']}, Dennis: {voice_mapping['Dennis']}")
-        
-        for index, segment in enumerate(dialogue):
-            speaker = segment.get('speaker', '').strip()
-            text = segment.get('text', '').strip()
+        Args:
+            prompt: Text prompt for the TTS model
+            voice_name: Google TTS prebuilt voice name
             
-            if not speaker or not text:
-                print(f"Skipping segment {index}: missing speaker or text")
-                continue
+        Returns:
+            Raw 16-bit PCM audio returned by the model
+        """
+        # Create audio config with the correct voice for this speaker
+        audio_config = types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                        voice_name=voice_name,
+                    )
+                )
+            )
+        )
+        return self._request_pcm(prompt, audio_config, voice_name)
 
-            if speaker not in voice_mapping:
-                print(f"Skipping unknown speaker: {speaker}")
-                continue
-            
-            # Get the correct voice for this speaker
-            voice_name = voice_mapping[speaker]
+    def _synthesize_dialogue_pcm(self, lines: List[Tuple[str, str]], voice_mapping: Dict[str, str]) -> bytes:
+        """
+        Synthesize several consecutive dialogue lines in one multi-speaker TTS request.
+        
+        Args:
+            lines: (speaker, text) pairs in dialogue order
+            voice_mapping: Speaker -> Google TTS prebuilt voice name
             
-            print(f"Processing segment {index}: {speaker} -> {voice_name}")
-
-            try:
-                # Create prompt - simple format that TTS can understand
-                prompt = f"{speaker}: {text}"
-                
-                # Create audio config with the correct voice for this speaker
-                audio_config = types.GenerateContentConfig(
-                    response_modalities=["AUDIO"],
-                    speech_config=types.SpeechConfig(
-                        voice_config=types.VoiceConfig(
-                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                voice_name=voice_name,
+        Returns:
+            Raw 16-bit PCM audio of all lines
+        """
+        speakers = sorted(voice_mapping)
+        prompt = f"TTS the following conversation between {' and '.join(speakers)}:\n" + "\n".join(
+            f"{speaker}: {text}" for speaker, text in lines
+        )
+        audio_config = types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                    speaker_voice_configs=[
+                        types.SpeakerVoiceConfig(
+                            speaker=speaker,
+                            voice_config=types.VoiceConfig(
+                                prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                    voice_name=voice_mapping[speaker],
+                                )
                             )
                         )
-                    )
+                        for speaker in speakers
+                    ]
                 )
-                
-                # Generate audio using Google TTS (single speaker)
-                response = self.client.models.generate_content(
-                    model="gemini-2.5-flash-preview-tts",
+            )
+        )
+        voices = ",".join(f"{speaker}={voice_mapping[speaker]}" for speaker in speakers)
+        return self._request_pcm(prompt, audio_config, voices)
+
+    def _request_pcm(self, prompt: str, audio_config: types.GenerateContentConfig, voice_key: str) -> bytes:
+        """
+        Send a TTS request, going through the TTS cache if enabled.
+        
+        Args:
+            prompt: Text prompt for the TTS model
+            audio_config: Request config including the speech config
+            voice_key: Voice name(s) used, part of the cache key
+            
+        Returns:
+            Raw 16-bit PCM audio returned by the model
+        """
+        cache_key = None
+        if self.cache:
+            cache_key = hash_key(
+                TTS_MODEL,
+                voice_key,
+                prompt,
+                audio_config.model_dump_json(exclude_none=True)
+            )
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached
+        
+        # Generate audio using Google TTS
+        response = self._generate_content(prompt, audio_config)
+        
+        # Extract audio data from response
+        audio_data = None
+        for candidate in response.candidates:
+            if candidate.content and candidate.content.parts:
+                for part in candidate.content.parts:
+                    if hasattr(part, 'inline_data') and part.inline_data:
+                        audio_data = part.inline_data.data
+                        break
+        
+        if not audio_data:
+            raise ValueError("No audio data in response")
+        
+        if cache_key:
+            self.cache.put(cache_key, audio_data)
+        return audio_data
+
+    def _generate_content(self, prompt: str, audio_config: types.GenerateContentConfig) -> Any:
+        """
+        Call the TTS model through the shared rate limiter.
+        
+        Quota errors block the bucket for every job using the same API key
+        and the request is retried once the back-off has passed, so running
+        out of quota slows synthesis down instead of dropping segments. With
+        adaptive concurrency, each call also holds a slot of the AIMD window
+        and reports its latency and outcome back to it.
+        """
+        for attempt in range(self.audio_config.rate_limit_retries + 1):
+            # The concurrency slot comes first, so calls waiting for a shrunken
+            # window have not spent request quota yet
+            ticket = self.concurrency.acquire() if self.concurrency else None
+            start = time.monotonic()
+            error = None
+            try:
+                self.rate_limiter.acquire(self.rate_limit_key)
+                # Waiting for quota is not part of the call's latency
+                start = time.monotonic()
+                return self.client.models.generate_content(
+                    model=TTS_MODEL,
                     contents=prompt,
                     config=audio_config,
                 )
-                
-                # Extract audio data from response
+            except Exception as e:
+                error = e
+                if not is_rate_limit_error(e) or attempt == self.audio_config.rate_limit_retries:
+                    raise
+                delay = retry_delay(e) or DEFAULT_BACKOFF_SECONDS
+                print(f"TTS quota exhausted, backing off {delay:.0f}s (attempt {attempt + 1})")
+                self.rate_limiter.backoff(self.rate_limit_key, delay)
+            finally:
+                if self.concurrency:
+                    self.concurrency.release(ticket, time.monotonic() - start, error, work=len(prompt))
+
+    def _render_segment(
+        self,
+        index: int,
+        speaker: str,
+        text: str,
+        voice_name: str,
+        audio_data: Optional[bytes] = None
+    ) -> PCMSegment:
+        """
+        Synthesize a single dialogue line and apply segment-level processing in memory.
+        
+        Args:
+            index: Position of the line in the dialogue
+            speaker: Name of the speaker
+            text: Dialogue text
+            voice_name: Google TTS prebuilt voice name for the speaker
+            audio_data: PCM already synthesized for this line (e.g. cut from a batch)
+            
+        Returns:
+            Processed PCM segment
+        """
+        print(f"Processing segment {index}: {speaker} -> {voice_name}")
+        
+        # Google TTS returns 16-bit mono PCM
+        if audio_data is None:
+            audio_data = self._synthesize_pcm(f"{speaker}: {text}", voice_name)
+        audio = AudioSegment(
+            data=audio_data,
+            sample_width=2,
+            frame_rate=self.audio_config.sample_rate,
+            channels=self.audio_config.channels
+        )
+        
+        # Normalize audio (other loudness modes are handled by the mixer)
+        if self.audio_config.normalize and self.audio_config.loudness_mode == "segment":
+            audio = audio.normalize()
+            audio = audio + 4  # Slight boost
+        
+        return PCMSegment.from_audio_segment(index, speaker, audio, self.sources.get(index))
+
+    def _render_with_retries(
+        self,
+        index: int,
+        speaker: str,
+        text: str,
+        voice_name: str,
+        audio_data: Optional[bytes] = None
+    ) -> PCMSegment:
+        """
+        Render a line, retrying failures with jittered exponential backoff.
+        
+        Quota errors are already retried by _generate_content, so running
+        out of rate limit wait is not retried again here. Retries always
+        synthesize the line on its own, even if it was cut from a batch.
+        """
+        attempts = self.audio_config.segment_retries + 1
+        for attempt in range(attempts):
+            try:
+                return self._render_segment(index, speaker, text, voice_name, audio_data)
+            except RateLimitTimeout:
+                raise
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = jittered_backoff(
+                    attempt,
+                    self.audio_config.segment_retry_delay,
+                    self.audio_config.segment_retry_max_delay
+                )
+                print(f"Segment {index} failed ({str(e)}), retrying in {delay:.1f}s (attempt {attempt + 1})")
                 audio_data = None
-                for candidate in response.candidates:
-                    if candidate.content and candidate.content.parts:
-                        for part in candidate.content.parts:
-                            if hasattr(part, 'inline_data') and part.inline_data:
-                                audio_data = part.inline_data.data
-                                break
-                
-                if not audio_data:
-                    raise ValueError("No audio data in response")
-                
-                # Save as WAV first (Google TTS returns PCM)
-                wav_filename = f"{self.output_dir}/{index:03d}_{speaker}.wav"
-                self._save_wave_file(wav_filename, audio_data)
-                
-                # Convert to MP3 and normalize
-                audio = AudioSegment.from_wav(wav_filename)
-                
-                # Normalize audio
-                if self.audio_config.normalize:
-                    audio = audio.normalize()
-                    audio = audio + 4  # Slight boost
-                
+                time.sleep(delay)
+
+    def _segment_path(self, index: int, speaker: str) -> str:
+        """Path of the segment file for a dialogue line."""
+        return f"{self.output_dir}/{index:03d}_{speaker}.{self.audio_config.segment_format}"
+
+    def _existing_segment(self, index: int, speaker: str, text: str, voice_name: str) -> Optional[str]:
+        """Return the segment file of a line if the manifest shows an earlier run finished it."""
+        filename = self.manifest.completed(index, speaker, text, voice_name)
+        if filename:
+            print(f'Reusing segment {index} from "{filename}"')
+        return filename
+
+    def _generate_segment(
+        self,
+        index: int,
+        speaker: str,
+        text: str,
+        voice_name: str,
+        audio_data: Optional[bytes] = None
+    ) -> Optional[str]:
+        """
+        Synthesize a single dialogue line and write it to a segment file.
+        
+        WAV segments hold the PCM losslessly, so the final mix is the only
+        lossy encode; MP3 segments are smaller but encoded twice.
+        
+        Args:
+            index: Position of the line in the dialogue
+            speaker: Name of the speaker
+            text: Dialogue text
+            voice_name: Google TTS prebuilt voice name for the speaker
+            audio_data: PCM already synthesized for this line
+            
+        Returns:
+            Path of the generated segment file, or None if synthesis failed
+        """
+        try:
+            segment = self._render_with_retries(index, speaker, text, voice_name, audio_data)
+            
+            # Write under a temporary name so an interrupted run never leaves
+            # a truncated file that a later run would reuse
+            filename = self._segment_path(index, speaker)
+            partial = f"{filename}.part"
+            if self.audio_config.segment_format == "wav":
+                self._save_wave_file(
+                    partial,
+                    segment.pcm,
+                    channels=segment.channels,
+                    rate=segment.sample_rate,
+                    sample_width=segment.sample_width
+                )
+            else:
                 # Export as MP3
-                mp3_filename = f"{self.output_dir}/{index:03d}_{speaker}.mp3"
-                audio.export(
-                    mp3_filename,
+                segment.to_audio_segment().export(
+                    partial,
                     format="mp3",
                     bitrate=self.audio_config.bitrate,
                     parameters=["-ar", str(self.audio_config.sample_rate)]
                 )
-                
-                # Remove temporary WAV file
-                if os.path.exists(wav_filename):
-                    os.remove(wav_filename)
-                
-                audio_files.append(mp3_filename)
-                print(f'Audio content written to file "{mp3_filename}"')
+            os.replace(partial, filename)
+            self.manifest.mark(index, speaker, text, voice_name, DONE, path=filename)
+            
+            print(f'Audio content written to file "{filename}"')
+            return filename
+
+        except Exception as e:
+            print(f"Error processing segment {index}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            self.manifest.mark(index, speaker, text, voice_name, FAILED, error=str(e))
+            return None
+
+    def _generate_segment_pcm(
+        self,
+        index: int,
+        speaker: str,
+        text: str,
+        voice_name: str,
+        audio_data: Optional[bytes] = None
+    ) -> Optional[PCMSegment]:
+        """
+        Synthesize a single dialogue line and keep it in memory.
+        
+        Returns:
+            PCM segment, or None if synthesis failed
+        """
+        try:
+            segment = self._render_with_retries(index, speaker, text, voice_name, audio_data)
+            self.manifest.mark(index, speaker, text, voice_name, DONE)
+            return segment
+        except Exception as e:
+            print(f"Error processing segment {index}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            self.manifest.mark(index, speaker, text, voice_name, FAILED, error=str(e))
+            return None
+
+    def _batches(self, jobs: List[Tuple[int, str, str, str]]) -> List[List[Tuple[int, str, str, str]]]:
+        """
+        Group consecutive lines into TTS requests within the configured size budget.
+        
+        A batch is rendered as one continuous conversation, so it never spans
+        a gap in the segment indices (e.g. segments reused from an earlier run).
+        """
+        max_chars = self.audio_config.tts_batch_chars
+        if max_chars <= 0:
+            return [[job] for job in jobs]
+        batches = []
+        batch, chars = [], 0
+        for job in jobs:
+            length = len(job[1]) + len(job[2]) + 3
+            adjacent = not batch or job[0] == batch[-1][0] + 1
+            if batch and (not adjacent or chars + length > max_chars
+                          or len(batch) >= self.audio_config.tts_batch_lines):
+                batches.append(batch)
+                batch, chars = [], 0
+            batch.append(job)
+            chars += length
+        if batch:
+            batches.append(batch)
+        return batches
 
+    def _split_batch(self, batch: List[Tuple[int, str, str, str]], voice_mapping: Dict[str, str]) -> List[bytes]:
+        """
+        Synthesize a batch of lines in one multi-speaker request and cut the audio per line.
+        
+        Raises:
+            ValueError: If the audio has no pauses matching the line boundaries
+        """
+        audio_data = self._synthesize_dialogue_pcm([(speaker, text) for _, speaker, text, _ in batch], voice_mapping)
+        channels = self.audio_config.channels
+        samples = np.frombuffer(audio_data, dtype=np.int16)
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels)
+        cuts = _turn_boundaries(samples, self.audio_config.sample_rate, [len(text) for _, _, text, _ in batch])
+        if cuts is None:
+            raise ValueError("could not find a pause between every pair of lines")
+        bounds = [0] + cuts + [len(samples)]
+        return [samples[start:end].tobytes() for start, end in zip(bounds, bounds[1:])]
+
+    def _run_batch(
+        self,
+        batch: List[Tuple[int, str, str, str]],
+        worker: Callable[..., Any],
+        voice_mapping: Dict[str, str]
+    ) -> List[Any]:
+        """Run the worker over a batch of lines, falling back to one request per line if the batch fails."""
+        pieces: List[Optional[bytes]] = [None] * len(batch)
+        if len(batch) > 1:
+            try:
+                pieces = self._split_batch(batch, voice_mapping)
             except Exception as e:
-                print(f"Error processing segment {index}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                print(f"Batched TTS for segments {batch[0][0]}-{batch[-1][0]} failed ({str(e)}), synthesizing lines one by one")
+        return [worker(*job, audio_data=piece) for job, piece in zip(batch, pieces)]
+
+    def _iter_segments(
+        self,
+        dialogue: List[Dict[str, str]],
+        worker: Callable[..., Any],
+        reuse: Optional[Callable[..., Any]] = None
+    ) -> Iterator[Any]:
+        """
+        Run a per-segment worker over the dialogue on a bounded thread pool.
+        
+        With ``tts_min_chars`` / ``tts_max_chars`` set, the dialogue is first
+        re-chunked (see _rechunk) into segments of a good TTS request size,
+        numbered in order; otherwise each line is one segment numbered by its
+        dialogue index. ``self.sources`` maps each segment back to its
+        dialogue lines. Results are yielded in order as soon as they and
+        every earlier segment are done. At most ``2 * max_workers`` requests
+        are in flight or buffered ahead of the consumer, so a slow consumer bounds
+        memory instead of the whole episode piling up. With
+        ``tts_batch_chars`` set, each request covers several segments. The
+        outcome of every segment is recorded in the segment manifest.
+        
+        Args:
+            dialogue: List of dialogue dictionaries with 'speaker' and 'text' keys
+            worker: Callable taking (index, speaker, text, voice_name, audio_data); a None result marks a failed segment
+            reuse: Callable taking (index, speaker, text, voice_name) that returns the result of an
+                earlier run, or None if the segment still has to be synthesized
+            
+        Yields:
+            Successful worker results ordered by segment index
+        """
+        voice_mapping = self._voice_mapping()
+        
+        print(f"Voice mapping - Sarah: {voice_mapping['Sarah']}, Dennis: {voice_mapping['Dennis']}")
+        
+        lines = []
+        for index, segment in enumerate(dialogue):
+            speaker = segment.get('speaker', '').strip()
+            text = segment.get('text', '').strip()
+            
+            if not speaker or not text:
+                print(f"Skipping segment {index}: missing speaker or text")
                 continue
 
-        return sorted(audio_files)
+            if speaker not in voice_mapping:
+                print(f"Skipping unknown speaker: {speaker}")
+                continue
+            
+            lines.append((index, speaker, text))
+        
+        # Segments are numbered after re-chunking; self.sources maps them back to dialogue lines
+        chunks = _rechunk(lines, self.audio_config.tts_min_chars, self.audio_config.tts_max_chars)
+        if len(chunks) != len(lines):
+            print(f"Re-chunked {len(lines)} lines into {len(chunks)} TTS segments")
+        self.sources = {index: sources for index, (_, _, sources) in enumerate(chunks)}
+        
+        # Get the correct voice for each speaker
+        jobs = [
+            (index, speaker, text, voice_mapping[speaker])
+            for index, (speaker, text, _) in enumerate(chunks)
+        ]
+        self.manifest.begin(jobs, self.sources)
+        
+        # Results left by an earlier run are yielded in order without a request
+        reused = {}
+        if reuse:
+            for job in jobs:
+                result = reuse(*job)
+                if result is not None:
+                    reused[job[0]] = result
+            if reused:
+                print(f"Reusing {len(reused)} of {len(jobs)} segments from an earlier run")
+            jobs = [job for job in jobs if job[0] not in reused]
+        ready = deque(sorted(reused.items()))
+
+        batches = self._batches(jobs)
+        if len(batches) < len(jobs):
+            print(f"Batched {len(jobs)} lines into {len(batches)} TTS requests")
+        # With adaptive concurrency the pool is sized for the largest window;
+        # the limiter decides how many of its threads are calling the API
+        pool_size = self.audio_config.max_concurrency if self.concurrency else self.audio_config.max_workers
+        max_workers = max(1, min(pool_size, max(len(batches), 1)))
+        window = 2 * max_workers
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = deque()
+            remaining = iter(batches)
+            for batch in islice(remaining, window):
+                pending.append((batch[0][0], executor.submit(self._run_batch, batch, worker, voice_mapping)))
+            while pending:
+                first_index, future = pending.popleft()
+                while ready and ready[0][0] < first_index:
+                    yield ready.popleft()[1]
+                results = future.result()
+                for batch in islice(remaining, 1):
+                    pending.append((batch[0][0], executor.submit(self._run_batch, batch, worker, voice_mapping)))
+                for result in results:
+                    if result is not None:
+                        yield result
+            while ready:
+                yield ready.popleft()[1]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        failures = self.manifest.failures()
+        if failures:
+            print(f"{len(failures)} segment(s) failed, see {self.manifest.path}")
+
+        if self.cache:
+            stats = self.cache.stats()
+            print(f"TTS cache - hits: {stats['hits']}, misses: {stats['misses']}")
+        if self.concurrency:
+            stats = self.concurrency.stats()
+            print(f"TTS concurrency - window: {stats['window']}, decreases: {stats['decreases']}")
+
+    def generate_audio(
+        self,
+        dialogue: List[Dict[str, str]],
+        on_segment: Optional[Callable[[str], None]] = None
+    ) -> List[str]:
+        """
+        Generate audio files for each script segment using Google TTS.
+        
+        Segments are synthesized concurrently on a bounded thread pool
+        (``AudioConfig.max_workers``; 1 keeps the old serial behaviour).
+        The result is always ordered by dialogue index. Segments finished
+        by an earlier run over the same directory are reused when the
+        manifest shows the same text and voice, so calling this again after
+        a failure or interruption only synthesizes the missing lines.
+        
+        Args:
+            dialogue: List of dialogue dictionaries with 'speaker' and 'text' keys
+            on_segment: Optional function called with each segment file, in
+                dialogue order, as soon as it and all earlier ones are ready
+            
+        Returns:
+            List of generated audio file paths
+        """
+        for filename in self._iter_segments(dialogue, self._generate_segment, reuse=self._existing_segment):
+            if on_segment:
+                on_segment(filename)
+        return self.manifest.segment_files()
+
+    def generate_audio_pcm(
+        self,
+        dialogue: List[Dict[str, str]],
+        on_segment: Optional[Callable[[PCMSegment], None]] = None
+    ) -> List[PCMSegment]:
+        """
+        Generate in-memory PCM segments for each script segment using Google TTS.
+        
+        Nothing is written to disk, so the mixer's final encode is the only
+        ffmpeg step of the audio stage.
+        
+        Args:
+            dialogue: List of dialogue dictionaries with 'speaker' and 'text' keys
+            on_segment: Optional function called with each segment, in
+                dialogue order, as soon as it and all earlier ones are ready
+            
+        Returns:
+            List of PCM segments ordered by dialogue index
+        """
+        segments = []
+        for segment in self._iter_segments(dialogue, self._generate_segment_pcm):
+            segments.append(segment)
+            if on_segment:
+                on_segment(segment)
+        return segments
+
+    def iter_audio_pcm(self, dialogue: List[Dict[str, str]]) -> Iterator[PCMSegment]:
+        """
+        Yield in-memory PCM segments in dialogue order as they are synthesized.
+        
+        Lets the mixer encode the start of the podcast while later lines
+        are still being synthesized.
+        
+        Args:
+            dialogue: List of dialogue dictionaries with 'speaker' and 'text' keys
+            
+        Yields:
+            PCM segments ordered by dialogue index
+        """
+        return self._iter_segments(dialogue, self._generate_segment_pcm)
+
+
+class StreamingEncoder:
+    """
+    Encoder that streams raw PCM into one long-lived ffmpeg process.
+    Audio is written through ffmpeg's stdin as it becomes available, so the
+    whole podcast never has to be held in memory before encoding starts.
+    """
+
+    def __init__(
+        self,
+        output_file: str,
+        frame_rate: int,
+        channels: int,
+        format: str = "mp3",
+        parameters: Optional[List[str]] = None
+    ):
+        """
+        Start the ffmpeg process.
+        
+        Args:
+            output_file: Path of the encoded output
+            frame_rate: Sample rate of the incoming 16-bit PCM
+            channels: Channel count of the incoming PCM
+            format: ffmpeg output format
+            parameters: Extra ffmpeg output parameters
+        """
+        self.output_file = output_file
+        self._stderr = tempfile.TemporaryFile()
+        command = [
+            AudioSegment.converter, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(frame_rate), "-ac", str(channels), "-i", "pipe:0",
+            "-f", format
+        ] + (parameters or []) + [output_file]
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr
+        )
+
+    def _error_output(self) -> str:
+        """Read what ffmpeg wrote to stderr."""
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', errors='replace').strip()
+
+    def write(self, samples: np.ndarray) -> None:
+        """
+        Feed samples to the encoder.
+        
+        Args:
+            samples: (frames, channels) int16 samples
+        """
+        if not len(samples):
+            return
+        try:
+            # Write straight from the array (possibly memory-mapped) without a bytes copy
+            self._process.stdin.write(memoryview(np.ascontiguousarray(samples)).cast('B'))
+        except BrokenPipeError:
+            self._process.wait()
+            raise RuntimeError(f"ffmpeg stopped accepting audio: {self._error_output()}")
+
+    def close(self) -> str:
+        """
+        Finish encoding and wait for ffmpeg to exit.
+        
+        Returns:
+            Path of the encoded output
+        """
+        self._process.stdin.close()
+        return_code = self._process.wait()
+        error_output = self._error_output()
+        self._stderr.close()
+        if return_code != 0:
+            raise RuntimeError(f"ffmpeg exited with code {return_code}: {error_output}")
+        return self.output_file
+
+    def abort(self) -> None:
+        """Stop ffmpeg without finishing the output."""
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        if not self._stderr.closed:
+            self._stderr.close()
 
 
 class PodcastMixer:
@@ -218,59 +1187,605 @@ class PodcastMixer:
     Mixes multiple audio files with effects into final podcast.
     """
     
-    def __init__(self, output_dir: str = "output/podcast"):
+    def __init__(self, output_dir: str = "output/podcast", audio_config: Optional[AudioConfig] = None):
         """
         Initialize the podcast mixer.
         
         Args:
             output_dir: Directory to save the final podcast
+            audio_config: Optional audio configuration (defaults to AudioConfig())
         """
-        self.audio_config = AudioConfig()
+        self.audio_config = audio_config or AudioConfig()
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def _load_segment(self, source: Union[str, PCMSegment]) -> AudioSegment:
+        """Load a segment from a file path or an in-memory PCM segment."""
+        if isinstance(source, PCMSegment):
+            return source.to_audio_segment()
+        if source.lower().endswith(".wav"):
+            # Read lossless segments directly instead of decoding through ffmpeg
+            with wave.open(source, "rb") as wf:
+                return AudioSegment(
+                    data=wf.readframes(wf.getnframes()),
+                    sample_width=wf.getsampwidth(),
+                    frame_rate=wf.getframerate(),
+                    channels=wf.getnchannels()
+                )
+        return AudioSegment.from_file(source)
+
+    def _profiles(self, profiles: Optional[List[OutputProfile]]) -> List[OutputProfile]:
+        """Get the requested output profiles, defaulting to AudioConfig.output_profiles."""
+        if profiles is None:
+            profiles = [OUTPUT_PROFILES[name] for name in self.audio_config.output_profiles]
+        if not profiles:
+            raise ValueError("No output profiles requested")
+        return profiles
+
+    def _output_file(self, profile: OutputProfile) -> str:
+        """Get the output path of a profile, creating its directory."""
+        output_file = os.path.join(self.output_dir, profile.filename)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        return output_file
+
+    def _output_parameters(self, profile: OutputProfile, frame_rate: int) -> List[str]:
+        """Get a profile's encode parameters, resampling only if its output rate differs from the mix."""
+        output_rate = profile.sample_rate or self.audio_config.output_sample_rate
+        if output_rate and output_rate != frame_rate:
+            return profile.parameters + ["-ar", str(output_rate)]
+        return list(profile.parameters)
+
+    def _encode_profile(self, samples: np.ndarray, frame_rate: int, profile: OutputProfile) -> str:
+        """Encode a mixed sample buffer to one output profile."""
+        output_file = self._output_file(profile)
+        if profile.format == "mp3" and self.audio_config.encoder == "parallel":
+            return encode_mp3_parallel(
+                samples,
+                frame_rate,
+                output_file,
+                output_rate=profile.sample_rate or self.audio_config.output_sample_rate,
+                parameters=profile.parameters,
+                workers=self.audio_config.encode_workers,
+                converter=AudioSegment.converter
+            )
+        
+        encoder = StreamingEncoder(
+            output_file,
+            frame_rate,
+            samples.shape[1],
+            format=profile.format,
+            parameters=self._output_parameters(profile, frame_rate)
+        )
+        try:
+            encoder.write(samples)
+        except Exception:
+            encoder.abort()
+            raise
+        return encoder.close()
+
+    def encode_profiles(
+        self,
+        samples: np.ndarray,
+        frame_rate: int,
+        profiles: Optional[List[OutputProfile]] = None
+    ) -> Dict[str, str]:
+        """
+        Encode one mixed sample buffer to several output profiles in parallel.
+        
+        Args:
+            samples: (frames, channels) int16 samples of the mix
+            frame_rate: Sample rate of the mix
+            profiles: Output profiles (defaults to AudioConfig.output_profiles)
+            
+        Returns:
+            Dictionary mapping profile name to output path
+        """
+        profiles = self._profiles(profiles)
+        # Each encode runs in its own ffmpeg process; threads only feed and wait on them
+        with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+            futures = {
+                profile.name: executor.submit(self._encode_profile, samples, frame_rate, profile)
+                for profile in profiles
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _normalize(self, buffers: List[np.ndarray], frame_rate: int, label: str) -> None:
+        """Bring sample buffers to the configured loudness target in place."""
+        stats = normalize_group(
+            buffers,
+            frame_rate,
+            target_loudness=self.audio_config.target_loudness,
+            compression_ratio=self.audio_config.compression_ratio,
+            compression_threshold=self.audio_config.compression_threshold,
+            peak_ceiling=self.audio_config.peak_ceiling
+        )
+        print(f"Loudness ({label}): {stats['input_lufs']:.1f} LUFS -> {stats['output_lufs']:.1f} LUFS")
+        if stats["target_miss_lu"] > TARGET_TOLERANCE_LU:
+            print(f"Loudness ({label}): target {self.audio_config.target_loudness:.1f} LUFS not reached "
+                  f"within the {self.audio_config.peak_ceiling:.1f} dBFS peak ceiling "
+                  f"({stats['target_miss_lu']:.1f} LU short)")
+
+    def _normalize_speaker_arrays(self, arrays: List[np.ndarray], speakers: List[str], frame_rates: List[int]) -> None:
+        """Normalize each speaker's sample buffers together to the loudness target, in place."""
+        for speaker in sorted(set(speakers)):
+            group = [arrays[i] for i, name in enumerate(speakers) if name == speaker]
+            self._normalize(group, frame_rates[speakers.index(speaker)], speaker)
+
+    def _normalize_speakers(self, segments: List[AudioSegment], speakers: List[str]) -> List[AudioSegment]:
+        """Normalize each speaker's segments together to the loudness target."""
+        arrays = [_samples(seg.set_sample_width(2)).copy() for seg in segments]
+        self._normalize_speaker_arrays(arrays, speakers, [seg.frame_rate for seg in segments])
+        return [
+            AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=seg.frame_rate, channels=seg.channels)
+            for samples, seg in zip(arrays, segments)
+        ]
+
+    @staticmethod
+    def _speaker_of(source: Union[str, PCMSegment]) -> str:
+        """Get the speaker of a segment from the segment or its {index:03d}_{speaker} file name."""
+        if isinstance(source, PCMSegment):
+            return source.speaker
+        name = os.path.splitext(os.path.basename(source))[0]
+        return name.split('_', 1)[1] if '_' in name else name
+
+    def _mix_pydub(self, segments: List[AudioSegment], crossfade: int) -> AudioSegment:
+        """Mix segments by appending them one after another with pydub."""
+        mixed = segments[0]
+        for next_segment in segments[1:]:
+            # Add silence and use crossfade
+            silence = AudioSegment.silent(duration=SEGMENT_GAP_MS)
+            next_segment = silence + next_segment
+            mixed = mixed.append(next_segment, crossfade=crossfade)
+        return mixed
+
+    def _probe(self, source: Union[str, PCMSegment]) -> Tuple[int, int]:
+        """Get the channel count and sample rate of a segment, reading only the WAV header when possible."""
+        if isinstance(source, PCMSegment):
+            return source.channels, source.sample_rate
+        if source.lower().endswith(".wav"):
+            with wave.open(source, "rb") as wf:
+                return wf.getnchannels(), wf.getframerate()
+        segment = self._load_segment(source)
+        return segment.channels, segment.frame_rate
+
+    def _convert_segments(
+        self,
+        audio_files: List[Union[str, PCMSegment]],
+        channels: int,
+        frame_rate: int
+    ) -> List[np.ndarray]:
+        """
+        Load segments one at a time and convert them to the mix format.
+        
+        With ``scratch_dir`` set each converted segment is appended to a
+        scratch file and dropped before the next one is loaded, and the
+        returned buffers are views into that file mapped into memory, so the
+        heap holds at most one segment.
+        
+        Returns:
+            (frames, channels) int16 samples of each segment
+        """
+        def converted(source: Union[str, PCMSegment]) -> AudioSegment:
+            segment = self._load_segment(source)
+            return segment.set_channels(channels).set_frame_rate(frame_rate).set_sample_width(2)
+        
+        if not self.audio_config.scratch_dir:
+            return [_samples(converted(source)) for source in audio_files]
+        
+        os.makedirs(self.audio_config.scratch_dir, exist_ok=True)
+        lengths = []
+        with tempfile.TemporaryFile(prefix="segments_", suffix=".pcm", dir=self.audio_config.scratch_dir) as scratch:
+            for source in audio_files:
+                data = converted(source).raw_data
+                scratch.write(data)
+                lengths.append(len(data) // (2 * channels))
+            scratch.flush()
+            if not sum(lengths):
+                return [np.zeros((0, channels), dtype=np.int16) for _ in lengths]
+            store = np.memmap(scratch, dtype=np.int16, mode="r+", shape=(sum(lengths), channels))
+        bounds = np.cumsum([0] + lengths)
+        return [store[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _mix_numpy(
+        self,
+        audio_files: List[Union[str, PCMSegment]],
+        crossfade: int,
+        speakers: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Mix segments into one preallocated sample buffer.
+        
+        Produces the same samples as the pydub engine's chain of
+        ``append(silence + segment, crossfade=...)`` calls, but each segment is
+        written once instead of the whole podcast being copied on every append,
+        so mixing is linear in podcast length. The mix format is read from the
+        segment headers, so the segments are loaded only once, one at a time
+        (see _convert_segments).
+        
+        Args:
+            audio_files: Audio file paths or in-memory PCM segments, in order
+            crossfade: Crossfade duration in milliseconds
+            speakers: Speaker of each segment, to normalize per speaker (None skips)
+        
+        Returns:
+            Tuple of (frames, channels) int16 samples and their sample rate
+        """
+        silence = AudioSegment.silent(duration=SEGMENT_GAP_MS)
+        formats = [self._probe(audio_file) for audio_file in audio_files]
+        channels = max(fmt[0] for fmt in formats)
+        frame_rate = max([fmt[1] for fmt in formats] + [silence.frame_rate])
+        arrays = self._convert_segments(audio_files, channels, frame_rate)
+        if speakers:
+            arrays = [samples if samples.flags.writeable else samples.copy() for samples in arrays]
+            self._normalize_speaker_arrays(arrays, speakers, [frame_rate] * len(arrays))
+        gap = np.zeros((len(silence.set_frame_rate(frame_rate).raw_data) // 2, channels), dtype=np.int16)
+        
+        # Plan every append up front to size the buffer once
+        steps = []
+        length = peak = len(arrays[0])
+        for samples in arrays[1:]:
+            step = self._plan_append(length, len(gap) + len(samples), frame_rate, crossfade)
+            steps.append(step)
+            length = step["end"]
+            peak = max(peak, length)
+        
+        buffer = self._allocate(peak, channels)
+        length = len(arrays[0])
+        buffer[:length] = arrays[0]
+        for samples, step in zip(arrays[1:], steps):
+            joined = self._join(buffer[:length], 0, np.concatenate([gap, samples]), step, frame_rate, crossfade)
+            head = step["head"]
+            buffer[head:head + len(joined)] = joined
+            length = head + len(joined)
+        
+        return buffer[:length], frame_rate
+
+    def _allocate(self, frames: int, channels: int) -> np.ndarray:
+        """
+        Allocate a zeroed int16 mix buffer.
+        
+        With ``scratch_dir`` set the buffer is a memory-mapped file, so a long
+        episode lives in the page cache (which the kernel can write back and
+        reclaim) rather than on the heap. The file is unlinked right away and
+        disappears once the buffer is released.
+        """
+        if not self.audio_config.scratch_dir or not frames:
+            return np.zeros((frames, channels), dtype=np.int16)
+        os.makedirs(self.audio_config.scratch_dir, exist_ok=True)
+        with tempfile.TemporaryFile(prefix="mix_", suffix=".pcm", dir=self.audio_config.scratch_dir) as scratch:
+            # The mapping keeps its own handle, so it outlives the file object
+            return np.memmap(scratch, dtype=np.int16, mode="w+", shape=(frames, channels))
+
+    @staticmethod
+    def _join(
+        mixed: np.ndarray,
+        offset: int,
+        incoming: np.ndarray,
+        step: Dict[str, int],
+        frame_rate: int,
+        crossfade: int
+    ) -> np.ndarray:
+        """
+        Build the samples that replace the mix from ``step["head"]`` onwards.
+        
+        Args:
+            mixed: End of the podcast mixed so far (at least from ``step["head"]``)
+            offset: Absolute frame position of ``mixed[0]``
+            incoming: Silence + next segment samples
+            step: Layout from _plan_append
+            frame_rate: Sample rate of the mix
+            crossfade: Crossfade duration in milliseconds
+            
+        Returns:
+            Crossfade region followed by the rest of the incoming audio
+        """
+        if not crossfade:
+            return incoming
+        len1, len2 = step["len1"], step["len2"]
+        tail = _slice_ms(mixed, len1 - crossfade, len1, frame_rate, offset=offset)
+        xf = _overlay(
+            _fade(tail, frame_rate, to_gain=-120),
+            _fade(_slice_ms(incoming, 0, crossfade, frame_rate), frame_rate, from_gain=-120)
+        )
+        body = _slice_ms(incoming, crossfade, len2, frame_rate)
+        return np.concatenate([xf, body])
+
+    @staticmethod
+    def _plan_append(frames1: int, frames2: int, frame_rate: int, crossfade: int) -> Dict[str, int]:
+        """
+        Compute the buffer layout of one crossfaded append.
+        
+        Args:
+            frames1: Frames of the podcast mixed so far
+            frames2: Frames of the incoming (silence + segment) audio
+            frame_rate: Sample rate of the mix
+            crossfade: Crossfade duration in milliseconds
+            
+        Returns:
+            Dictionary with the millisecond lengths of both sides, the frame
+            where the crossfade starts ("head") and the new mix length ("end")
+        """
+        len1 = _length_ms(frames1, frame_rate)
+        len2 = _length_ms(frames2, frame_rate)
+        if not crossfade:
+            return {"len1": len1, "len2": len2, "head": frames1, "end": frames1 + frames2}
+        if crossfade > len1:
+            raise ValueError(f"Crossfade is longer than the original AudioSegment ({crossfade}ms > {len1}ms)")
+        if crossfade > len2:
+            raise ValueError(f"Crossfade is longer than the appended AudioSegment ({crossfade}ms > {len2}ms)")
+        
+        def sliced(frames: int, start_ms: int, end_ms: int) -> int:
+            start = _frame_index(start_ms, frame_rate)
+            end = _frame_index(end_ms, frame_rate)
+            available = max(0, min(end, frames) - start)
+            return end - start if available else 0
+        
+        def faded(frames: int) -> int:
+            return len(_fade(np.zeros((frames, 1), dtype=np.int16), frame_rate, to_gain=-120))
+        
+        head = _frame_index(len1 - crossfade, frame_rate)
+        xf = faded(sliced(frames1, len1 - crossfade, len1))
+        body = sliced(frames2, crossfade, len2)
+        return {"len1": len1, "len2": len2, "head": head, "end": head + xf + body}
+
+    def _mix_buffer(
+        self,
+        audio_files: List[Union[str, PCMSegment]],
+        crossfade: int
+    ) -> Tuple[np.ndarray, int]:
+        """Load, loudness-process and mix segments into one (frames, channels) int16 buffer."""
+        loudness_mode = self.audio_config.loudness_mode if self.audio_config.normalize else None
+        speakers = [self._speaker_of(f) for f in audio_files] if loudness_mode == "speaker" else None
+        
+        if self.audio_config.mix_engine == "pydub":
+            segments = [self._load_segment(audio_file) for audio_file in audio_files]
+            if speakers:
+                segments = self._normalize_speakers(segments, speakers)
+            mixed = self._mix_pydub(segments, crossfade)
+            samples, frame_rate = _samples(mixed.set_sample_width(2)), mixed.frame_rate
+        else:
+            samples, frame_rate = self._mix_numpy(audio_files, crossfade, speakers)
+        
+        if loudness_mode == "mix":
+            if not samples.flags.writeable:
+                samples = samples.copy()
+            self._normalize([samples], frame_rate, "mix")
+        return samples, frame_rate
+
+    def mix_profiles(
+        self,
+        audio_files: List[Union[str, PCMSegment]],
+        profiles: Optional[List[OutputProfile]] = None,
+        crossfade: int = 50
+    ) -> Dict[str, str]:
+        """
+        Mix multiple audio files once and encode the mix to several output profiles.
+        
+        Args:
+            audio_files: List of audio file paths or in-memory PCM segments to mix
+            profiles: Output profiles (defaults to AudioConfig.output_profiles)
+            crossfade: Crossfade duration in milliseconds
+            
+        Returns:
+            Dictionary mapping profile name to output path
+        """
+        if not audio_files:
+            raise ValueError("No audio files provided to mix")
+
+        try:
+            samples, frame_rate = self._mix_buffer(audio_files, crossfade)
+            outputs = self.encode_profiles(samples, frame_rate, profiles)
+            
+            for output_file in outputs.values():
+                print(f"Successfully mixed podcast to: {output_file}")
+            return outputs
+
+        except Exception as e:
+            print(f"Error mixing podcast: {str(e)}")
+            raise
+
     def mix_audio(
         self,
-        audio_files: List[str],
+        audio_files: List[Union[str, PCMSegment]],
         crossfade: int = 50
     ) -> str:
         """
         Mix multiple audio files into a final podcast.
         
         Args:
-            audio_files: List of audio file paths to mix
+            audio_files: List of audio file paths or in-memory PCM segments to mix
             crossfade: Crossfade duration in milliseconds
             
         Returns:
             Path to the final mixed podcast file
         """
-        if not audio_files:
-            raise ValueError("No audio files provided to mix")
+        return self.mix_profiles(audio_files, [OUTPUT_PROFILES["mp3"]], crossfade)["mp3"]
 
-        try:
-            mixed = AudioSegment.from_file(audio_files[0])
-            for audio_file in audio_files[1:]:
-                next_segment = AudioSegment.from_file(audio_file)
-                # Add silence and use crossfade
-                silence = AudioSegment.silent(duration=200)
-                next_segment = silence + next_segment
-                mixed = mixed.append(next_segment, crossfade=crossfade)
-
-            # Simplified output path handling
-            output_file = os.path.join(self.output_dir, "podcast_final.mp3")
+    def stream_profiles(
+        self,
+        audio_files: Iterable[Union[str, PCMSegment]],
+        profiles: Optional[List[OutputProfile]] = None,
+        crossfade: int = 50,
+        segment_loudness: bool = False
+    ) -> Dict[str, str]:
+        """
+        Mix segments as they arrive and stream the result into one ffmpeg encode per profile.
+        
+        Produces the same mix as mix_profiles, but only the crossfade window
+        at the end of the mix is held back, so peak memory is bounded by one
+        segment and encoding overlaps with synthesis of later segments when
+        ``audio_files`` is a generator such as
+        PodcastAudioGenerator.iter_audio_pcm. All segments are converted to
+        the channel count and sample rate of the first one. MP3 is always
+        encoded in a single ffmpeg process.
+        
+        The whole mix (or all of a speaker's segments) is never available,
+        so the "mix" and "speaker" loudness modes cannot be applied: they
+        are rejected unless ``segment_loudness`` asks for each segment to be
+        brought to the loudness target on its own instead.
+        
+        Args:
+            audio_files: Iterable of audio file paths or in-memory PCM segments, in order
+            profiles: Output profiles (defaults to AudioConfig.output_profiles)
+            crossfade: Crossfade duration in milliseconds
+            segment_loudness: Normalize each segment on its own in the "mix" and "speaker" modes
             
-            mixed.export(
-                output_file,
-                format="mp3",
-                parameters=[
-                    "-q:a", "0",  # Highest quality
-                    "-ar", "48000"  # Professional sample rate
-                ]
+        Returns:
+            Dictionary mapping profile name to output path
+            
+        Raises:
+            ValueError: If the loudness mode needs the whole mix and segment_loudness is not set
+        """
+        profiles = self._profiles(profiles)
+        loudness_mode = self.audio_config.loudness_mode if self.audio_config.normalize else None
+        if loudness_mode in ("mix", "speaker") and not segment_loudness:
+            raise ValueError(
+                f'Loudness mode "{loudness_mode}" needs the whole mix, which streaming never holds; '
+                f'use the "segment" mode with the stream pipeline'
             )
-
-            print(f"Successfully mixed podcast to: {output_file}")
-            return output_file
+        encoders: Dict[str, StreamingEncoder] = {}
+        pending = None
+        
+        def write(samples: np.ndarray) -> None:
+            for encoder in encoders.values():
+                encoder.write(samples)
+        
+        try:
+            for audio_file in audio_files:
+                segment = self._load_segment(audio_file)
+                if loudness_mode in ("mix", "speaker"):
+                    segment = self._normalize_speakers([segment], [self._speaker_of(audio_file)])[0]
+                if pending is None:
+                    silence = AudioSegment.silent(duration=SEGMENT_GAP_MS)
+                    channels = segment.channels
+                    frame_rate = max(segment.frame_rate, silence.frame_rate)
+                    gap = np.zeros((len(silence.set_frame_rate(frame_rate).raw_data) // 2, channels), dtype=np.int16)
+                    # Frames that a following crossfade may still rewrite
+                    keep = _frame_index(crossfade + 1, frame_rate) + 1
+                    for profile in profiles:
+                        encoders[profile.name] = StreamingEncoder(
+                            self._output_file(profile),
+                            frame_rate,
+                            channels,
+                            format=profile.format,
+                            parameters=self._output_parameters(profile, frame_rate)
+                        )
+                    pending = _samples(segment.set_frame_rate(frame_rate).set_sample_width(2))
+                    offset = 0
+                    continue
+                
+                samples = _samples(segment.set_channels(channels).set_frame_rate(frame_rate).set_sample_width(2))
+                incoming = np.concatenate([gap, samples])
+                step = self._plan_append(offset + len(pending), len(incoming), frame_rate, crossfade)
+                joined = self._join(pending, offset, incoming, step, frame_rate, crossfade)
+                pending = np.concatenate([pending[:step["head"] - offset], joined])
+                
+                # Everything before the next crossfade window is final
+                flush = max(0, len(pending) - keep)
+                write(pending[:flush])
+                pending = pending[flush:]
+                offset += flush
+            
+            if pending is None:
+                raise ValueError("No audio files provided to mix")
+            write(pending)
+            outputs = {name: encoder.close() for name, encoder in encoders.items()}
+            
+            for output_file in outputs.values():
+                print(f"Successfully mixed podcast to: {output_file}")
+            return outputs
 
         except Exception as e:
+            for encoder in encoders.values():
+                encoder.abort()
             print(f"Error mixing podcast: {str(e)}")
             raise
+
+    def mix_stream(
+        self,
+        audio_files: Iterable[Union[str, PCMSegment]],
+        crossfade: int = 50
+    ) -> str:
+        """
+        Mix segments as they arrive and stream the result into a single ffmpeg encode.
+        
+        Args:
+            audio_files: Iterable of audio file paths or in-memory PCM segments, in order
+            crossfade: Crossfade duration in milliseconds
+            
+        Returns:
+            Path to the final mixed podcast file
+        """
+        return self.stream_profiles(audio_files, [OUTPUT_PROFILES["mp3"]], crossfade)["mp3"]
+
+
+class LivePreview:
+    """
+    Live stream of the podcast fed alongside the configured audio pipeline.
+    
+    Segments handed to ``add`` in dialogue order are mixed and encoded to
+    one output profile (such as the "live" HLS playlist) on a background
+    thread with PodcastMixer.stream_profiles, while the files or memory
+    pipeline keeps its segment files, manifest, loudness mode and encoder
+    for the final mix. Errors of the preview are printed and never fail the
+    job.
+    """
+    
+    def __init__(self, mixer: PodcastMixer, profile: OutputProfile, crossfade: int = 50):
+        """
+        Start the preview encoder thread.
+        
+        Args:
+            mixer: Mixer of the job (its audio configuration and output directory are used)
+            profile: Output profile of the preview
+            crossfade: Crossfade duration in milliseconds
+        """
+        self.profile = profile
+        self.output: Optional[str] = None
+        self._queue: Queue = Queue()
+        self._thread = threading.Thread(
+            target=self._run, args=(mixer, crossfade), name="live-preview", daemon=True
+        )
+        self._thread.start()
+
+    def _segments(self) -> Iterator[Union[str, PCMSegment]]:
+        """Yield queued segments until close() is called."""
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                return
+            yield segment
+
+    def _run(self, mixer: PodcastMixer, crossfade: int) -> None:
+        """Mix and encode queued segments (runs on the preview thread)."""
+        segments = self._segments()
+        try:
+            # A preview has no whole mix to measure; each segment is brought to the target instead
+            self.output = mixer.stream_profiles(
+                segments, [self.profile], crossfade, segment_loudness=True
+            )[self.profile.name]
+        except Exception as e:
+            print(f"Live preview stopped: {str(e)}")
+        # Keep consuming so add() never blocks on a failed preview
+        for _ in segments:
+            pass
+
+    def add(self, segment: Union[str, PCMSegment]) -> None:
+        """
+        Queue the next segment of the podcast.
+        
+        Args:
+            segment: Segment file path or in-memory PCM segment, in dialogue order
+        """
+        self._queue.put(segment)
+
+    def close(self) -> Optional[str]:
+        """
+        Finish the preview after the last segment.
+        
+        Returns:
+            Path of the preview output, or None if it failed or got no segments
+        """
+        self._queue.put(None)
+        self._thread.join()
+        return self.output